@@ -0,0 +1,83 @@
+"""
+Configuração do gunicorn para produção.
+
+Uso: gunicorn -c python:app.gunicorn_conf app.wsgi
+
+Todos os valores podem ser ajustados por variáveis de ambiente GUNICORN_*.
+"""
+
+import multiprocessing
+import os
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# A regra usual é 2 * núcleos + 1 processos
+workers = int(os.environ.get(
+    'GUNICORN_WORKERS',
+    multiprocessing.cpu_count() * 2 + 1
+))
+
+# Cada processo atende várias requisições em threads (gthread), para não
+# ficar ocioso enquanto espera o Postgres. O ganho cresce com a latência
+# do BD; com o BD no mesmo host, sync e gthread ficam próximos. Meça com o
+# comando load_test antes de trocar GUNICORN_WORKER_CLASS para sync
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Orçamento de conexões com o Postgres (max_connections padrão de 100, com
+# 3 reservadas a superusuários). Com DB_CONN_MAX_AGE > 0 cada thread mantém
+# a sua conexão aberta entre requisições, e as threads de processamento de
+# imagens (RECIPE_IMAGE_WORKERS) também abrem as suas, então cada worker
+# usa até threads + RECIPE_IMAGE_WORKERS conexões, ou DB_POOL_MAX_SIZE se
+# o pool estiver ativo. O total de todos os workers deve caber em
+# DB_MAX_CONNECTIONS com folga para migrate e comandos de manutenção
+db_max_connections = int(os.environ.get('DB_MAX_CONNECTIONS', 100))
+
+# Carrega o Django no processo mestre antes do fork, compartilhando a
+# memória das páginas não modificadas entre os workers
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# Mantém as conexões do proxy reverso abertas entre requisições
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recicla os workers depois de N requisições (com jitter para que não
+# reiniciem todos juntos), contendo vazamentos de memória
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# O proxy reverso repassa o esquema e o IP do cliente
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '*')
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def db_connections_per_worker():
+    ''' Máximo de conexões com o BD abertas por um worker '''
+    pool_size = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+    if pool_size:
+        return pool_size
+
+    return threads + int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+
+
+def on_starting(server):
+    ''' Avisa se os workers podem esgotar as conexões do Postgres '''
+    needed = workers * db_connections_per_worker()
+    if needed > db_max_connections - 3:
+        server.log.warning(
+            'Workers may open up to %s database connections, above the '
+            'DB_MAX_CONNECTIONS budget of %s; reduce GUNICORN_WORKERS or '
+            'set DB_POOL_MAX_SIZE', needed, db_max_connections
+        )
+
+
+def pre_fork(server, worker):
+    ''' Fecha as conexões do mestre para que nenhum worker as herde '''
+    from django.db import connections
+
+    connections.close_all()
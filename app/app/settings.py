@@ -23,7 +23,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'i09n-!qw_amk(zqa9vc*yua!z()(ci-3_r85ocy2%o=m0-c@a0'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DEBUG', '1') == '1'
 
 
 ALLOWED_HOSTS = ['*']
@@ -37,14 +37,15 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
-    'rest_framework.authtoken',
     'core',
     'user',
     'recipe',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,13 +79,22 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
+# Conexões persistentes por DB_CONN_MAX_AGE segundos (0 fecha a cada
+# requisição), verificadas no primeiro uso de cada requisição. Com
+# DB_POOL_MAX_SIZE > 0 as conexões fechadas voltam para um pool do processo
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS'),         
+        'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'HEALTH_CHECKS': os.environ.get('DB_HEALTH_CHECKS', '1') == '1',
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 0)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        },
     }
 }
 
@@ -107,6 +117,34 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hasher de senhas preferido (pbkdf2, argon2 ou bcrypt; os dois últimos
+# exigem argon2-cffi ou bcrypt instalados) e seus custos. Senhas com outro
+# hasher ou custo são refeitas no próximo login
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 120000)
+)
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 512)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 2)
+)
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+
+# Hashes simultâneos por processo; os demais logins aguardam na fila
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 1))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.1/topics/i18n/
@@ -131,4 +169,105 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT= '/vol/web/static'
 
+# Arquivos enviados são endereçados pelo conteúdo, evitando duplicatas
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+# Processamento assíncrono das imagens de Recipes
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_PROCESSING_EAGER = False
+RECIPE_IMAGE_MAX_UPLOAD_SIZE = int(
+    os.environ.get('RECIPE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_DIMENSION = int(
+    os.environ.get('RECIPE_IMAGE_MAX_DIMENSION', 8000)
+)
+# Segundos após os quais um job ainda em processamento é considerado
+# abandonado (ex.: worker encerrado) e volta a ser processado
+RECIPE_IMAGE_JOB_TIMEOUT = int(
+    os.environ.get('RECIPE_IMAGE_JOB_TIMEOUT', 600)
+)
+
 AUTH_USER_MODEL = 'core.User'
+
+# JSON da API renderizado e lido pelo orjson quando instalado. Use
+# API_JSON_BACKEND=json para forçar a implementação da stdlib
+API_JSON_BACKEND = os.environ.get('API_JSON_BACKEND', 'orjson')
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.StreamingJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Limites por usuário (ou IP, se anônimo) em token buckets; veja
+    # core.throttling. Sem proxy à frente o X-Forwarded-For vem do próprio
+    # cliente e é ignorado; API_NUM_PROXIES=1 somente atrás do nginx
+    'DEFAULT_THROTTLE_CLASSES': (
+        'core.throttling.TokenBucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'read': os.environ.get('THROTTLE_READ_RATE', '600/min'),
+        'write': os.environ.get('THROTTLE_WRITE_RATE', '120/min'),
+        'upload': os.environ.get('THROTTLE_UPLOAD_RATE', '20/min'),
+        'login': os.environ.get('THROTTLE_LOGIN_RATE', '10/min'),
+    },
+    'NUM_PROXIES': int(os.environ.get('API_NUM_PROXIES', 0)),
+}
+# Alias de CACHES para compartilhar os limites entre processos; vazio mantém
+# os token buckets na memória de cada processo
+THROTTLE_CACHE = os.environ.get('THROTTLE_CACHE')
+# Itens lidos do BD por vez nas listagens enviadas em streaming
+API_STREAM_CHUNK_SIZE = int(os.environ.get('API_STREAM_CHUNK_SIZE', 1000))
+
+# Cache local de cada processo e, com MEMCACHED_LOCATION (host:porta,
+# separados por vírgula), um memcached compartilhado entre os workers no
+# alias "shared"
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+if MEMCACHED_LOCATION:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': MEMCACHED_LOCATION.split(','),
+    }
+
+# Cache versionado das listagens de Recipes, Tags e Ingredients. Precisa ser
+# compartilhado entre os processos: com um alias vazio ou de LocMemCache, o
+# cache e as ETags ficam desabilitados
+RECIPE_RESPONSE_CACHE = os.environ.get(
+    'RECIPE_RESPONSE_CACHE',
+    'shared' if MEMCACHED_LOCATION else ''
+)
+RECIPE_RESPONSE_CACHE_TIMEOUT = int(
+    os.environ.get('RECIPE_RESPONSE_CACHE_TIMEOUT', 300)
+)
+
+# Quantidade máxima de itens aceitos pelos endpoints de lote
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get('RECIPE_BULK_MAX_ITEMS', 1000))
+
+# Cache de autenticação por token. TOKEN_AUTH_SHARED_CACHE pode apontar para
+# um alias de CACHES para compartilhar o cache entre processos
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 30))
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000))
+TOKEN_AUTH_SHARED_CACHE = os.environ.get('TOKEN_AUTH_SHARED_CACHE')
+
+# Validade, em segundos, dos tokens emitidos no login (padrão: 7 dias)
+TOKEN_TTL = int(os.environ.get('TOKEN_TTL', 7 * 24 * 60 * 60))
+
+# Configuração de text search do Postgres usada na busca de Recipes
+RECIPE_SEARCH_CONFIG = os.environ.get('RECIPE_SEARCH_CONFIG', 'simple')
+
+# Listagens e detalhes de leitura servidos pelo serializer compilado
+# (recipe.compiled), que gera o mesmo JSON sem instanciar models
+RECIPE_COMPILED_SERIALIZERS = os.environ.get(
+    'RECIPE_COMPILED_SERIALIZERS', '1'
+) == '1'
+
+# Token exigido pelo endpoint /metrics (Prometheus); vazio o desabilita
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
@@ -38,4 +38,6 @@ admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Tag)
 admin.site.register(models.Ingredient)
 admin.site.register(models.Recipe)
-
+admin.site.register(models.RecipeImageJob)
+admin.site.register(models.ImportCheckpoint)
+admin.site.register(models.AuthToken)
@@ -0,0 +1,50 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    ''' Cache LRU em memória com expiração por TTL, seguro entre threads '''
+
+    def __init__(self, max_size, ttl, timer=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        ''' Retorna o valor da chave, ou default se ausente ou expirado '''
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            value, expires_at = item
+            if expires_at <= self.timer():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        ''' Armazena o valor, removendo o item menos usado se cheio '''
+        with self._lock:
+            self._data[key] = (value, self.timer() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        ''' Remove a chave do cache, se presente '''
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        ''' Remove todos os itens do cache '''
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
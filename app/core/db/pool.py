@@ -0,0 +1,127 @@
+import threading
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class ConnectionStats:
+    ''' Contadores de uso das conexões com o BD, seguros entre threads
+
+    reused conta os ciclos de requisição atendidos por uma conexão que já
+    estava aberta (persistente ou vinda do pool) e opened os que precisaram
+    abrir uma conexão nova.
+    '''
+
+    FIELDS = ('opened', 'reused', 'health_check_failures', 'pool_timeouts')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field):
+        with self._lock:
+            self._counts[field] += 1
+
+    def snapshot(self):
+        ''' Retorna uma cópia dos contadores, com a taxa de reuso '''
+        with self._lock:
+            counts = dict(self._counts)
+
+        total = counts['opened'] + counts['reused']
+        counts['reuse_rate'] = counts['reused'] / total if total else 0.0
+        return counts
+
+
+stats = ConnectionStats()
+
+
+def is_usable(connection):
+    ''' Executa uma consulta mínima para verificar a conexão '''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except psycopg2.Error:
+        return False
+
+    return True
+
+
+class ConnectionPool:
+    ''' Pool de conexões psycopg2 do processo, com tamanho máximo
+
+    Conexões devolvidas com uma transação aberta sofrem rollback; as
+    quebradas são descartadas. Quando todas estão em uso, aguarda até
+    timeout segundos por uma conexão livre.
+    '''
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def get(self, connect, health_check=False):
+        ''' Retorna (conexão, reutilizada), abrindo uma com connect() se o
+        pool não tiver nenhuma livre '''
+        if not self._slots.acquire(timeout=self.timeout):
+            stats.incr('pool_timeouts')
+            raise psycopg2.OperationalError(
+                f'Connection pool exhausted ({self.max_size} connections)'
+            )
+
+        try:
+            while True:
+                with self._lock:
+                    connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    return connect(), False
+                if connection.closed or \
+                        (health_check and not is_usable(connection)):
+                    stats.incr('health_check_failures')
+                    self._discard(connection)
+                    continue
+                return connection, True
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def put(self, connection):
+        ''' Devolve a conexão ao pool, liberando a vaga '''
+        try:
+            if not connection.closed and connection.get_transaction_status() \
+                    != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except psycopg2.Error:
+            pass
+
+        try:
+            if connection.closed or connection.get_transaction_status() \
+                    != extensions.TRANSACTION_STATUS_IDLE:
+                self._discard(connection)
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+        finally:
+            self._slots.release()
+
+    def __len__(self):
+        return len(self._idle)
+
+    def close(self):
+        ''' Fecha as conexões livres '''
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection in idle:
+            self._discard(connection)
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
@@ -0,0 +1,105 @@
+import logging
+import os
+import threading
+
+from django.db.backends.postgresql import base
+
+from core.db.pool import ConnectionPool, stats
+
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, max_size, timeout):
+    ''' Retorna o pool do alias no processo atual, criado no primeiro uso
+
+    O PID faz parte da chave para que processos criados por fork (workers
+    do gunicorn) nunca compartilhem conexões com o processo pai.
+    '''
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(max_size, timeout)
+        return _pools[key]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    ''' Backend PostgreSQL com health check e pool de conexões opcionais
+
+    Configurado pelas chaves extras do DATABASES:
+
+    - HEALTH_CHECKS: verifica a conexão persistente no primeiro uso de cada
+      requisição, reconectando se o BD a tiver encerrado;
+    - POOL: {'MAX_SIZE': ..., 'TIMEOUT': ...}; com MAX_SIZE maior que zero,
+      as conexões fechadas voltam para um pool do processo em vez de serem
+      encerradas.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            'HEALTH_CHECKS', False
+        )
+        self.cycle_started = True
+
+    @property
+    def pool(self):
+        pool = self.settings_dict.get('POOL') or {}
+        if not pool.get('MAX_SIZE'):
+            return None
+
+        return get_pool(self.alias, pool['MAX_SIZE'], pool.get('TIMEOUT', 10))
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            connection, reused = super().get_new_connection(conn_params), False
+        else:
+            connection, reused = pool.get(
+                lambda: super(DatabaseWrapper, self)
+                .get_new_connection(conn_params),
+                health_check=self.health_check_enabled
+            )
+
+        stats.incr('reused' if reused else 'opened')
+        if not reused:
+            logger.debug(
+                'Opened database connection (reuse rate %.1f%%)',
+                stats.snapshot()['reuse_rate'] * 100
+            )
+        else:
+            self.isolation_level = self.settings_dict['OPTIONS'].get(
+                'isolation_level',
+                connection.isolation_level
+            )
+        return connection
+
+    def ensure_connection(self):
+        ''' Conta o reuso e faz o health check no primeiro uso do ciclo '''
+        if self.cycle_started:
+            self.cycle_started = False
+            if self.connection is not None:
+                if self.health_check_enabled and not self.in_atomic_block \
+                        and not self.is_usable():
+                    stats.incr('health_check_failures')
+                    self.close()
+                else:
+                    stats.incr('reused')
+
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        ''' Chamado no início e no fim de cada requisição '''
+        super().close_if_unusable_or_obsolete()
+        self.cycle_started = True
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None or self.in_atomic_block:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            pool.put(self.connection)
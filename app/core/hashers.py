@@ -0,0 +1,106 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_executor():
+    ''' Retorna o pool de hashing, criado no primeiro uso '''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 1),
+                thread_name_prefix='password-hash',
+                initializer=_mark_worker
+            )
+        return _executor
+
+
+def _mark_worker():
+    _local.in_pool = True
+
+
+def run_in_pool(function, *args):
+    ''' Executa o hashing no pool limitado, aguardando o resultado
+
+    Com no máximo PASSWORD_HASHING_WORKERS hashes simultâneos por processo,
+    uma onda de logins fica na fila em vez de ocupar todos os núcleos e
+    atrasar as demais requisições.
+    '''
+    if getattr(_local, 'in_pool', False):
+        return function(*args)
+
+    return _get_executor().submit(function, *args).result()
+
+
+class PooledHasherMixin:
+    ''' Executa as operações custosas do hasher no pool de hashing '''
+
+    def encode(self, password, salt, *args):
+        return run_in_pool(super().encode, password, salt, *args)
+
+    def verify(self, password, encoded):
+        return run_in_pool(super().verify, password, encoded)
+
+    def harden_runtime(self, password, encoded):
+        return run_in_pool(super().harden_runtime, password, encoded)
+
+
+class PBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    ''' PBKDF2-SHA256 com iterações em PASSWORD_PBKDF2_ITERATIONS '''
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings,
+            'PASSWORD_PBKDF2_ITERATIONS',
+            hashers.PBKDF2PasswordHasher.iterations
+        )
+
+
+class Argon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    ''' Argon2 com os custos em PASSWORD_ARGON2_*; requer argon2-cffi '''
+
+    @property
+    def time_cost(self):
+        return getattr(
+            settings,
+            'PASSWORD_ARGON2_TIME_COST',
+            hashers.Argon2PasswordHasher.time_cost
+        )
+
+    @property
+    def memory_cost(self):
+        return getattr(
+            settings,
+            'PASSWORD_ARGON2_MEMORY_COST',
+            hashers.Argon2PasswordHasher.memory_cost
+        )
+
+    @property
+    def parallelism(self):
+        return getattr(
+            settings,
+            'PASSWORD_ARGON2_PARALLELISM',
+            hashers.Argon2PasswordHasher.parallelism
+        )
+
+
+class BCryptSHA256PasswordHasher(PooledHasherMixin,
+                                 hashers.BCryptSHA256PasswordHasher):
+    ''' bcrypt com PASSWORD_BCRYPT_ROUNDS rounds; requer bcrypt '''
+
+    @property
+    def rounds(self):
+        return getattr(
+            settings,
+            'PASSWORD_BCRYPT_ROUNDS',
+            hashers.BCryptSHA256PasswordHasher.rounds
+        )
@@ -0,0 +1,39 @@
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    ''' Benchmark de logins por segundo de cada hasher de senhas '''
+
+    help = 'Mede quantas verificações de senha por segundo um núcleo faz'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+
+    def handle(self, *args, **options):
+        ''' Lida com o comando '''
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode('senha-de-teste', hasher.salt())
+            except ValueError as exc:
+                self.stdout.write(self.style.WARNING(
+                    f'{hasher.algorithm}: skipped ({exc})'
+                ))
+                continue
+
+            start = time.perf_counter()
+            for _ in range(options['logins']):
+                hasher.verify('senha-de-teste', encoded)
+            elapsed = time.perf_counter() - start
+
+            summary = ', '.join(
+                f'{key} {value}'
+                for key, value in hasher.safe_summary(encoded).items()
+                if key not in ('algorithm', 'salt', 'hash')
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{hasher.algorithm} ({summary}): '
+                f'{options["logins"] / elapsed:.1f} logins/s per core'
+            ))
@@ -0,0 +1,89 @@
+import threading
+import time
+import uuid
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from rest_framework.request import Request
+
+from core.throttling import TokenBucketStore, CacheTokenBucketStore, \
+                            TokenBucketThrottle
+
+
+class Command(BaseCommand):
+    ''' Benchmark do custo por requisição do throttling com token bucket '''
+
+    help = 'Mede o custo (µs) de cada verificação de limite de requisições'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=200000)
+        parser.add_argument('--keys', type=int, default=10000)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--cache',
+            default='default',
+            help='Alias de CACHES medido como store compartilhado'
+        )
+
+    def handle(self, *args, **options):
+        ''' Lida com o comando '''
+        checks, keys = options['checks'], options['keys']
+        names = [f'read:user:{i}' for i in range(keys)]
+
+        def run(store, count, offset=0):
+            for i in range(count):
+                store.consume(names[(i + offset) % keys], 600, 10.0)
+
+        store = TokenBucketStore()
+        self.report('in-memory store', checks,
+                    self.measure(lambda: run(store, checks)))
+
+        threads = options['threads']
+        store = TokenBucketStore()
+        per_thread = checks // threads
+        workers = [
+            threading.Thread(target=run, args=(store, per_thread, n * 997))
+            for n in range(threads)
+        ]
+
+        def run_threads():
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        self.report(f'in-memory store, {threads} threads',
+                    per_thread * threads, self.measure(run_threads))
+
+        # Prefixo próprio para não consumir nem remover buckets reais
+        cached = CacheTokenBucketStore(
+            options['cache'],
+            key_prefix=f'throttle-bench:{uuid.uuid4().hex}:',
+            track_keys=True
+        )
+        cache_checks = min(checks, 20000)
+        self.report(f'cache store ({options["cache"]})', cache_checks,
+                    self.measure(lambda: run(cached, cache_checks)))
+        cached.clear()
+
+        request = Request(RequestFactory().get('/api/recipe/recipes/'))
+        request.user = AnonymousUser()
+        throttle = TokenBucketThrottle()
+
+        def run_throttle():
+            for _ in range(checks):
+                throttle.allow_request(request, None)
+        self.report('TokenBucketThrottle.allow_request', checks,
+                    self.measure(run_throttle))
+
+    def measure(self, function):
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+    def report(self, label, checks, elapsed):
+        self.stdout.write(
+            f'{label}: {elapsed / checks * 1e6:.2f}µs per check '
+            f'({checks / elapsed:,.0f} checks/s)'
+        )
@@ -0,0 +1,85 @@
+import os
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Recipe
+
+
+IMAGE_FIELDS = ('image', 'image_thumbnail', 'image_medium')
+
+
+class Command(BaseCommand):
+    ''' Comando Django para remover imagens de Recipes sem referência '''
+
+    help = 'Remove imagens de Recipes que não são mais referenciadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default='uploads/recipe')
+        parser.add_argument(
+            '--grace-minutes',
+            type=int,
+            default=60,
+            help='Ignora arquivos mais novos, que podem ser de uploads '
+                 'ainda em andamento'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        ''' Lida com o comando '''
+        referenced = self._referenced_files()
+        cutoff = timezone.now() - timedelta(minutes=options['grace_minutes'])
+
+        removed = 0
+        for name in self._walk(options['directory']):
+            if name in referenced:
+                continue
+            if default_storage.get_modified_time(name) > cutoff:
+                continue
+            # Uma Recipe pode ter passado a usar o arquivo depois da leitura
+            # inicial das referências
+            if self._is_referenced(name):
+                continue
+
+            removed += 1
+            if options['dry_run']:
+                self.stdout.write(f'Would remove {name}')
+            else:
+                default_storage.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} unreferenced images'
+            if not options['dry_run'] else
+            f'Found {removed} unreferenced images'
+        ))
+
+    def _referenced_files(self):
+        ''' Retorna os nomes de todos os arquivos usados por alguma Recipe '''
+        referenced = set()
+        rows = Recipe.objects.values_list(*IMAGE_FIELDS).iterator()
+        for row in rows:
+            referenced.update(name for name in row if name)
+
+        return referenced
+
+    def _is_referenced(self, name):
+        ''' Verifica no BD se alguma Recipe usa o arquivo '''
+        query = Q()
+        for field in IMAGE_FIELDS:
+            query |= Q(**{field: name})
+
+        return Recipe.objects.filter(query).exists()
+
+    def _walk(self, directory):
+        ''' Percorre recursivamente os arquivos de um diretório do storage '''
+        if not default_storage.exists(directory):
+            return
+
+        directories, files = default_storage.listdir(directory)
+        for name in files:
+            yield os.path.join(directory, name)
+        for name in directories:
+            yield from self._walk(os.path.join(directory, name))
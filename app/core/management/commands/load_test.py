@@ -0,0 +1,89 @@
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, fraction):
+    ''' Percentil de uma lista já ordenada '''
+    if not values:
+        return 0.0
+
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    ''' Teste de carga de um endpoint HTTP, com conexões keep-alive '''
+
+    help = 'Mede requisições/s e a latência (p50/p99) de uma URL da API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--token', help='Token de autenticação')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        ''' Lida com o comando '''
+        url = urlsplit(options['url'])
+        if url.scheme not in ('http', 'https'):
+            raise CommandError('URL must be http or https')
+
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+
+        remaining = [options['requests']]
+        lock = threading.Lock()
+        latencies = []
+        errors = []
+
+        def worker():
+            connection_class = http.client.HTTPSConnection \
+                if url.scheme == 'https' else http.client.HTTPConnection
+            connection = connection_class(url.netloc, timeout=30)
+            path = url.path + (f'?{url.query}' if url.query else '')
+            while True:
+                with lock:
+                    if not remaining[0]:
+                        break
+                    remaining[0] -= 1
+
+                start = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status < 400
+                except (OSError, http.client.HTTPException) as exc:
+                    connection.close()
+                    ok, response = False, exc
+                elapsed = time.perf_counter() - start
+
+                with lock:
+                    latencies.append(elapsed)
+                    if not ok:
+                        errors.append(response)
+            connection.close()
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(options['concurrency'])
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total = time.perf_counter() - start
+
+        latencies.sort()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(latencies)} requests in {total:.2f}s: '
+            f'{len(latencies) / total:.1f} req/s, '
+            f'p50 {percentile(latencies, 0.5) * 1000:.1f}ms, '
+            f'p99 {percentile(latencies, 0.99) * 1000:.1f}ms, '
+            f'{len(errors)} errors'
+        ))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.models import AuthToken
+
+
+class Command(BaseCommand):
+    ''' Comando Django para remover os tokens de autenticação expirados '''
+
+    help = 'Remove em lotes os tokens de autenticação expirados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Pausa, em segundos, entre os lotes'
+        )
+
+    def handle(self, *args, **options):
+        ''' Lida com o comando '''
+        table = connection.ops.quote_name(AuthToken._meta.db_table)
+        # Cada lote é uma transação curta que usa o índice de expires_at e
+        # ignora as linhas travadas por outras transações
+        sql = (
+            f'DELETE FROM {table} WHERE id IN ('
+            f'SELECT id FROM {table} WHERE expires_at <= %s '
+            f'LIMIT %s FOR UPDATE SKIP LOCKED)'
+        )
+        now = timezone.now()
+
+        removed = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [now, options['batch_size']])
+                deleted = cursor.rowcount
+            removed += deleted
+            if deleted < options['batch_size']:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} expired tokens'
+        ))
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    ''' Comando Django para recalcular os contadores das Recipes '''
+
+    help = 'Recalcula os contadores usados nas estatísticas de Recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            help='Email do usuário; pode ser repetido. Padrão: todos'
+        )
+
+    def handle(self, *args, **options):
+        ''' Lida com o comando '''
+        user_ids = None
+        if options['user']:
+            users = dict(
+                get_user_model().objects.filter(email__in=options['user'])
+                .values_list('email', 'pk')
+            )
+            missing = set(options['user']) - set(users)
+            if missing:
+                raise CommandError(
+                    f'User {", ".join(sorted(missing))} does not exist'
+                )
+            user_ids = list(users.values())
+
+        rebuild_stats(user_ids)
+
+        self.stdout.write(self.style.SUCCESS('Recipe stats rebuilt'))
@@ -1,23 +1,82 @@
+import random
 import time
 
 from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     ''' Comando Django para pausar a execução até a conexão com o BD estar OK '''
 
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Tempo máximo de espera, em segundos'
+        )
+        parser.add_argument('--initial-delay', type=float, default=0.1)
+        parser.add_argument('--max-delay', type=float, default=5)
+        parser.add_argument(
+            '--wait-for-migrations',
+            action='store_true',
+            help='Aguarda também até não haver migrations pendentes'
+        )
+
     def handle(self, *args, **options):
         ''' Lida com o comando '''
         self.stdout.write('Waiting for database...')
-        db_conn =  None
-        while not db_conn:
+        connection = connections[options['database']]
+        deadline = time.monotonic() + options['timeout']
+        attempt = 0
+
+        while True:
             try:
-                db_conn = connections['default']
+                pending = self._probe(connection)
             except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
-        
+                # Descarta a conexão quebrada para a próxima tentativa reconectar
+                if connection.connection is not None and \
+                        not connection.is_usable():
+                    connection.close()
+                reason = 'Database unavailable'
+            else:
+                if not pending or not options['wait_for_migrations']:
+                    break
+                reason = f'{pending} unapplied migrations'
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CommandError(
+                    f'{reason} after {options["timeout"]:g} seconds'
+                )
+
+            # Backoff exponencial com jitter, sem ultrapassar o timeout
+            delay = min(
+                options['max_delay'],
+                options['initial_delay'] * 2 ** attempt
+            )
+            delay = min(random.uniform(0, delay), remaining)
+            self.stdout.write(f'{reason}, waiting {delay:.2f} seconds...')
+            time.sleep(delay)
+            attempt += 1
+
+        if pending:
+            self.stdout.write(self.style.WARNING(
+                f'Database available with {pending} unapplied migrations'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Database available!'))
+
+    def _probe(self, connection):
+        ''' Executa uma consulta no BD e retorna as migrations pendentes '''
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
 
-        self.stdout.write(self.style.SUCCESS('Database available!'))
+        executor = MigrationExecutor(connection)
+        return len(executor.migration_plan(
+            executor.loader.graph.leaf_nodes()
+        ))
@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from rest_framework import serializers
+
+from core.db.pool import stats as connection_stats
+
+
+# Limites (em segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    ''' Medições de uma requisição: consultas ao BD e tempo de serialização '''
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self._timer_depth = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        ''' Wrapper de connection.execute_wrapper que mede cada consulta '''
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+
+def current():
+    ''' Retorna as medições da requisição em andamento na thread, se houver '''
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def collect(metrics):
+    ''' Torna metrics as medições da thread enquanto o bloco executa '''
+    previous, _local.metrics = current(), metrics
+    try:
+        yield metrics
+    finally:
+        _local.metrics = previous
+
+
+@contextmanager
+def serializer_timer():
+    ''' Soma o tempo do bloco ao tempo de serialização da requisição
+
+    O tempo gasto em consultas ao BD dentro do bloco é descontado, e blocos
+    aninhados só são contados uma vez.
+    '''
+    metrics = current()
+    if metrics is None or metrics._timer_depth:
+        yield
+        return
+
+    metrics._timer_depth += 1
+    start, db_time = time.perf_counter(), metrics.db_time
+    try:
+        yield
+    finally:
+        metrics._timer_depth -= 1
+        metrics.serialize_time += time.perf_counter() - start - \
+            (metrics.db_time - db_time)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    ''' ListSerializer com o tempo de .data medido '''
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class TimedSerializerMixin:
+    ''' Mede o tempo de .data; use com list_serializer_class =
+    TimedListSerializer no Meta para cobrir também many=True '''
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class Histogram:
+    ''' Histograma cumulativo no formato do Prometheus '''
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class EndpointMetrics:
+    ''' Medições acumuladas de um endpoint (view e método HTTP) '''
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.response_bytes = 0
+        self.statuses = defaultdict(int)
+
+
+class Registry:
+    ''' Medições do processo, expostas no formato texto do Prometheus
+
+    Cada processo (worker do gunicorn) mantém as suas; agregue por instância
+    no Prometheus.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(EndpointMetrics)
+
+    def observe(self, view, method, status, duration, metrics, size):
+        ''' Registra uma requisição finalizada '''
+        with self._lock:
+            endpoint = self._endpoints[(view, method)]
+            endpoint.latency.observe(duration)
+            endpoint.db_queries += metrics.db_queries
+            endpoint.db_time += metrics.db_time
+            endpoint.serialize_time += metrics.serialize_time
+            endpoint.response_bytes += size
+            endpoint.statuses[status] += 1
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def render(self):
+        ''' Retorna as medições no formato texto do Prometheus '''
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+
+            def family(name, kind, help_text):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+            family('http_request_duration_seconds', 'histogram',
+                   'Request latency by view')
+            for (view, method), endpoint in endpoints:
+                labels = f'view="{view}",method="{method}"'
+                histogram = endpoint.latency
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(
+                        f'http_request_duration_seconds_bucket'
+                        f'{{{labels},le="{bound}"}} {count}'
+                    )
+                lines.append(
+                    f'http_request_duration_seconds_bucket'
+                    f'{{{labels},le="+Inf"}} {histogram.count}'
+                )
+                lines.append(
+                    f'http_request_duration_seconds_sum{{{labels}}} '
+                    f'{histogram.sum}'
+                )
+                lines.append(
+                    f'http_request_duration_seconds_count{{{labels}}} '
+                    f'{histogram.count}'
+                )
+
+            for name, attr, help_text in (
+                    ('http_request_db_queries_total', 'db_queries',
+                     'Database queries executed'),
+                    ('http_request_db_seconds_total', 'db_time',
+                     'Time spent in database queries'),
+                    ('http_request_serialize_seconds_total', 'serialize_time',
+                     'Time spent serializing responses'),
+                    ('http_response_size_bytes_total', 'response_bytes',
+                     'Response body bytes sent')):
+                family(name, 'counter', help_text)
+                for (view, method), endpoint in endpoints:
+                    lines.append(
+                        f'{name}{{view="{view}",method="{method}"}} '
+                        f'{getattr(endpoint, attr)}'
+                    )
+
+            family('http_responses_total', 'counter', 'Responses by status')
+            for (view, method), endpoint in endpoints:
+                for status, count in sorted(endpoint.statuses.items()):
+                    lines.append(
+                        f'http_responses_total{{view="{view}",'
+                        f'method="{method}",status="{status}"}} {count}'
+                    )
+
+        connections = connection_stats.snapshot()
+        for field in connection_stats.FIELDS:
+            family(f'db_connections_{field}_total', 'counter',
+                   f'Database connections {field.replace("_", " ")}')
+            lines.append(f'db_connections_{field}_total {connections[field]}')
+        family('db_connections_reuse_ratio', 'gauge',
+               'Request cycles served by an already open connection')
+        lines.append(
+            f'db_connections_reuse_ratio {connections["reuse_rate"]}'
+        )
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,83 @@
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+from core import metrics
+
+
+class InstrumentationMiddleware:
+    ''' Mede latência, consultas ao BD, serialização e tamanho de cada
+    resposta, registrando-as por view e enviando um header Server-Timing
+
+    Respostas em streaming são registradas quando o corpo termina de ser
+    enviado (ou a conexão é fechada), incluindo o tempo e as consultas ao BD
+    feitas durante o envio. O Server-Timing, enviado antes do corpo, cobre
+    somente o tempo até o início do streaming.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        start = time.perf_counter()
+
+        with self.instrument(request_metrics):
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - start
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={request_metrics.db_time * 1000:.1f};'
+            f'desc="{request_metrics.db_queries} queries"',
+            f'serialize;dur={request_metrics.serialize_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ))
+
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content,
+                request,
+                response,
+                request_metrics,
+                start
+            )
+        else:
+            self.observe(request, response, request_metrics, duration,
+                         len(response.content))
+
+        return response
+
+    @contextmanager
+    def instrument(self, request_metrics):
+        ''' Mede as consultas ao BD e a serialização feitas no bloco '''
+        with ExitStack() as stack:
+            stack.enter_context(metrics.collect(request_metrics))
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    request_metrics.execute_wrapper
+                ))
+            yield
+
+    def stream(self, content, request, response, request_metrics, start):
+        ''' Repassa o corpo em streaming, contando os bytes enviados '''
+        size = 0
+        try:
+            with self.instrument(request_metrics):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self.observe(request, response, request_metrics,
+                         time.perf_counter() - start, size)
+
+    def observe(self, request, response, request_metrics, duration, size):
+        match = getattr(request, 'resolver_match', None)
+        metrics.registry.observe(
+            match.view_name if match else 'unmatched',
+            request.method,
+            response.status_code,
+            duration,
+            request_metrics,
+            size
+        )
@@ -0,0 +1,36 @@
+# Generated by Django 2.1.15 on 2026-10-18 02:18
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    ''' Preenche o search_vector das Recipes já existentes '''
+    from core.search import recipe_search_vector
+
+    Recipe = apps.get_model('core', 'Recipe')
+    Recipe.objects.update(search_vector=recipe_search_vector(
+        apps.get_model('core', 'Tag'),
+        apps.get_model('core', 'Ingredient')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_attr_through_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_recipe_search__c01407_gin'),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 2.1.15 on 2026-10-18 02:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_counters(apps, schema_editor):
+    ''' Calcula os contadores das Recipes já existentes '''
+    from core.stats import rebuild_stats
+
+    rebuild_stats(get_model=apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_auth_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32)),
+                ('value', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterUniqueTogether(
+            name='recipecounter',
+            unique_together={('user', 'name')},
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,38 @@
-import uuid
+import binascii
 import os
+from datetime import timedelta
 
-from django.db import models
+from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
                                         PermissionsMixin
 
 from django.conf import settings
+from django.utils import timezone
 
 
 def recipe_image_file_path(instance, filename):
-    ''' Gera caminho de arquivo para uma nova imagem de recipe '''
-    ext =filename.split('.')[-1]
-    filename = f'{uuid.uuid4()}.{ext}'
+    ''' Gera caminho de arquivo para uma nova imagem de recipe
 
-    return os.path.join('uploads/recipe/', filename)  
+    O nome final é definido pelo storage a partir do hash do conteúdo.
+    '''
+    ext = filename.split('.')[-1].lower()
+    filename = f'image.{ext}'
+
+    return os.path.join('uploads/recipe/', filename)
+
+
+IMAGE_STATUS_PENDING = 'pending'
+IMAGE_STATUS_PROCESSING = 'processing'
+IMAGE_STATUS_READY = 'ready'
+IMAGE_STATUS_FAILED = 'failed'
+IMAGE_STATUS_CHOICES = (
+    (IMAGE_STATUS_PENDING, 'Pending'),
+    (IMAGE_STATUS_PROCESSING, 'Processing'),
+    (IMAGE_STATUS_READY, 'Ready'),
+    (IMAGE_STATUS_FAILED, 'Failed'),
+)
 
 
 class UserManager(BaseUserManager):
@@ -58,6 +77,13 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete = models.CASCADE
     )
+    # Mantido pelos signals e caminhos em lote; veja core.stats
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name']),
+        ]
 
     def __str__(self):
         return self.name
@@ -70,6 +96,13 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete = models.CASCADE
         )
+    # Mantido pelos signals e caminhos em lote; veja core.stats
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name']),
+        ]
 
     def __str__(self):
         return self.name
@@ -88,8 +121,134 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_thumbnail = models.ImageField(
+        null=True,
+        editable=False,
+        upload_to=recipe_image_file_path
+    )
+    image_medium = models.ImageField(
+        null=True,
+        editable=False,
+        upload_to=recipe_image_file_path
+    )
+    image_status = models.CharField(
+        max_length=16,
+        blank=True,
+        choices=IMAGE_STATUS_CHOICES
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id']),
+            GinIndex(fields=['search_vector']),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Os signals de contadores travam a linha antes do UPDATE e só a
+        # liberam depois de aplicar as variações (veja core.signals)
+        with transaction.atomic():
+            return super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
 
+class RecipeImageJob(models.Model):
+    ''' Job de processamento da imagem enviada para uma Recipe '''
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='image_jobs'
+    )
+    source = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=16,
+        choices=IMAGE_STATUS_CHOICES,
+        default=IMAGE_STATUS_PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.source} ({self.status})'
+
+
+class RecipeCounter(models.Model):
+    ''' Contador agregado das Recipes de um usuário (quantidade, soma de
+    time_minutes e faixas de preço), mantido incrementalmente '''
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='recipe_counters'
+    )
+    name = models.CharField(max_length=32)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('user', 'name'),)
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+
+class ImportCheckpoint(models.Model):
+    ''' Progresso de uma importação de Recipes, salvo a cada lote commitado '''
+    source = models.CharField(max_length=255, unique=True)
+    rows = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.source} ({self.rows} rows)'
+
+
+class AuthTokenManager(models.Manager):
+
+    def issue(self, user):
+        ''' Cria e retorna um novo token para o usuário '''
+        return self.create(user=user)
+
+
+class AuthToken(models.Model):
+    ''' Token de autenticação com validade de TOKEN_TTL segundos
+
+    Cada login emite um novo token; a expiração é indexada para que o
+    comando purge_expired_tokens remova os vencidos em lotes.
+    '''
+    key = models.CharField(max_length=40, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='auth_tokens'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = AuthTokenManager()
+
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = self.generate_key()
+        if self.expires_at is None:
+            self.expires_at = timezone.now() + \
+                timedelta(seconds=getattr(settings, 'TOKEN_TTL', 604800))
+
+        return super().save(*args, **kwargs)
+
+    @staticmethod
+    def generate_key():
+        return binascii.hexlify(os.urandom(20)).decode()
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,32 @@
+import codecs
+
+from django.conf import settings
+
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from core.renderers import FastJSONRenderer, orjson, use_orjson
+
+
+class FastJSONParser(parsers.JSONParser):
+    ''' JSONParser que usa o orjson quando disponível
+
+    O orjson lê somente UTF-8 e rejeita NaN/Infinity, como o modo estrito do
+    DRF; outros encodings são decodificados antes da leitura.
+    '''
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not use_orjson() or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            content = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                content = content.decode(encoding)
+            return orjson.loads(content)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % exc)
@@ -0,0 +1,143 @@
+import csv
+
+from django.conf import settings
+
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def use_orjson():
+    ''' Retorna se o orjson está instalado e habilitado em API_JSON_BACKEND '''
+    return orjson is not None and \
+        getattr(settings, 'API_JSON_BACKEND', 'orjson') == 'orjson'
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    ''' JSONRenderer que usa o orjson quando disponível
+
+    A saída é a mesma do JSONRenderer do DRF: compacta, em UTF-8 e com os
+    tipos que o orjson não trata nativamente (Decimal, datetime, lazy
+    strings...) convertidos pelo encoder do DRF. Saídas indentadas e valores
+    que o orjson recusa (como inteiros maiores que 64 bits) seguem pela
+    implementação da stdlib.
+    '''
+    orjson_options = 0
+    if orjson is not None:
+        orjson_options = orjson.OPT_NON_STR_KEYS | \
+            orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+
+        if not self._can_use_orjson(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=self.orjson_options
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Mesmo escape do DRF para \u2028 e \u2029, inválidos em JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+            .replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def _can_use_orjson(self, accepted_media_type, renderer_context):
+        ''' O orjson gera somente JSON compacto, sem escape de não-ASCII '''
+        return use_orjson() and self.compact and not self.ensure_ascii and \
+            self.get_indent(accepted_media_type, renderer_context or {}) \
+            is None
+
+
+class StreamingJSONRenderer(FastJSONRenderer):
+    ''' Renderiza listas em pedaços, item a item, sem montar o corpo inteiro
+
+    O resultado concatenado é idêntico ao de render() para a mesma lista.
+    '''
+
+    def render_stream(self, items, accepted_media_type=None,
+                      renderer_context=None):
+        ''' Gera os bytes do array JSON conforme os itens são produzidos '''
+        separator = b'['
+        for item in items:
+            yield separator
+            yield self.render(item, accepted_media_type, renderer_context)
+            separator = b',' if self.compact else b', '
+
+        yield b'[]' if separator == b'[' else b']'
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    ''' Renderiza listas como JSON delimitado por linhas, um item por linha '''
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, list):
+            data = [data]
+
+        return b''.join(self.render_stream(data))
+
+    def render_stream(self, items, accepted_media_type=None,
+                      renderer_context=None):
+        ''' Gera uma linha por item conforme os itens são produzidos '''
+        for item in items:
+            yield super().render(item) + b'\n'
+
+
+class _Echo:
+    ''' Arquivo que devolve o que seria escrito, usado pelo csv.writer '''
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    ''' Renderiza listas de objetos como CSV, com cabeçalho pelas chaves
+
+    Listas aninhadas viram um campo separado por ";", usando o name dos
+    objetos relacionados.
+    '''
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        if not isinstance(data, list):
+            data = [data]
+
+        return b''.join(self.render_stream(data))
+
+    def render_stream(self, items, accepted_media_type=None,
+                      renderer_context=None):
+        ''' Gera o cabeçalho e uma linha por item, conforme são produzidos '''
+        writer = csv.writer(_Echo())
+        header = None
+        for item in items:
+            if header is None:
+                header = list(item)
+                yield writer.writerow(header).encode(self.charset)
+            yield writer.writerow(
+                self._flatten(item.get(key)) for key in header
+            ).encode(self.charset)
+
+    def _flatten(self, value):
+        ''' Converte o valor de um campo em texto de uma célula '''
+        if value is None:
+            return ''
+        if isinstance(value, list):
+            return ';'.join(
+                str(item['name'] if isinstance(item, dict) else item)
+                for item in value
+            )
+        return value
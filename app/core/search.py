@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+                                           SearchVector
+from django.db.models import F, OuterRef, Subquery, TextField
+
+from core.models import Tag, Ingredient, Recipe
+
+
+def _search_config():
+    ''' Retorna a configuração de text search utilizada nas Recipes '''
+    return getattr(settings, 'RECIPE_SEARCH_CONFIG', 'simple')
+
+
+def _attr_names(model):
+    ''' Subquery com os nomes de Tags/Ingredients da Recipe externa '''
+    return Subquery(
+        model.objects.filter(recipe=OuterRef('pk'))
+        .values('recipe')
+        .annotate(names=StringAgg('name', ' '))
+        .values('names'),
+        output_field=TextField()
+    )
+
+
+def recipe_search_vector(tag_model=Tag, ingredient_model=Ingredient):
+    ''' Expressão do search_vector: título, nomes de tags e de ingredients '''
+    config = _search_config()
+    return (
+        SearchVector('title', weight='A', config=config) +
+        SearchVector(_attr_names(tag_model), weight='B', config=config) +
+        SearchVector(_attr_names(ingredient_model), weight='C', config=config)
+    )
+
+
+def update_search_vectors(recipe_ids):
+    ''' Recalcula o search_vector das Recipes informadas em um único UPDATE '''
+    recipe_ids = list(recipe_ids)
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=recipe_search_vector()
+        )
+
+
+def search_recipes(queryset, term):
+    ''' Filtra o queryset pelo termo buscado e anota o rank de cada Recipe '''
+    query = SearchQuery(term, config=_search_config())
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    )
@@ -0,0 +1,138 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, \
+                                     post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+from core.search import update_search_vectors
+from core.stats import RECIPE_ATTRS, recipe_deltas, refresh_attr_counts, \
+                       update_recipe_counters
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, update_fields=None, **kwargs):
+    ''' Atualiza o search_vector quando o título da Recipe pode ter mudado '''
+    if update_fields is None or 'title' in update_fields:
+        update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_attrs_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    ''' Atualiza o search_vector quando Tags/Ingredients são associados '''
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_search_vectors([instance.pk])
+    elif action == 'pre_clear':
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        update_search_vectors(instance.__dict__.pop('_search_recipe_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        update_search_vectors(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def recipe_attr_saved(sender, instance, created, **kwargs):
+    ''' Atualiza as Recipes que utilizam uma Tag/Ingredient renomeada '''
+    if not created:
+        update_search_vectors(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def recipe_attr_deleting(sender, instance, **kwargs):
+    ''' Guarda as Recipes afetadas antes das associações serem removidas '''
+    instance._search_recipe_ids = list(
+        instance.recipe_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def recipe_attr_deleted(sender, instance, **kwargs):
+    ''' Atualiza as Recipes que utilizavam uma Tag/Ingredient removida '''
+    update_search_vectors(instance.__dict__.pop('_search_recipe_ids', []))
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_saving(sender, instance, update_fields=None, **kwargs):
+    ''' Guarda time_minutes e price anteriores para os contadores
+
+    A linha fica travada até o fim da transação aberta por Recipe.save, para
+    que duas alterações simultâneas não partam dos mesmos valores.
+    '''
+    if instance._state.adding:
+        return
+    if update_fields is not None and \
+            not {'time_minutes', 'price'} & set(update_fields):
+        return
+
+    instance._stats_previous = Recipe.objects.filter(pk=instance.pk) \
+        .select_for_update().values_list('time_minutes', 'price').first()
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_counters_saved(sender, instance, created, **kwargs):
+    ''' Atualiza os contadores do usuário com a Recipe criada/alterada '''
+    previous = instance.__dict__.pop('_stats_previous', None)
+    if not created and previous is None:
+        return
+
+    deltas = recipe_deltas([(instance.time_minutes, instance.price)])
+    if previous is not None:
+        deltas.subtract(recipe_deltas([previous]))
+    update_recipe_counters(instance.user_id, deltas)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    ''' Guarda os dados da Recipe usados nos contadores antes de removê-la '''
+    instance._stats_deltas = recipe_deltas(
+        [(instance.time_minutes, instance.price)],
+        sign=-1
+    )
+    instance._stats_attr_ids = {
+        field: list(
+            getattr(instance, field).through.objects
+            .filter(recipe_id=instance.pk).values_list(column, flat=True)
+        )
+        for field, column in RECIPE_ATTRS
+    }
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_counters_deleted(sender, instance, **kwargs):
+    ''' Desconta a Recipe removida dos contadores '''
+    update_recipe_counters(
+        instance.user_id,
+        instance.__dict__.pop('_stats_deltas'),
+        create=False
+    )
+    for field, ids in instance.__dict__.pop('_stats_attr_ids').items():
+        refresh_attr_counts(Recipe._meta.get_field(field).related_model, ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_attr_counts_changed(sender, instance, action, reverse, model,
+                               pk_set, **kwargs):
+    ''' Recalcula o recipe_count das Tags/Ingredients (des)associadas '''
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_attr_counts(type(instance), [instance.pk])
+    elif action == 'pre_clear':
+        instance.__dict__.setdefault('_stats_cleared', {})[model] = list(
+            model.objects.filter(recipe=instance).values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        refresh_attr_counts(
+            model,
+            instance.__dict__.get('_stats_cleared', {}).pop(model, [])
+        )
+    elif action in ('post_add', 'post_remove'):
+        refresh_attr_counts(model, pk_set)
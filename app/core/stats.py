@@ -0,0 +1,188 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, \
+                             Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from core.models import Tag, Ingredient, Recipe, RecipeCounter
+
+
+# Limites superiores das faixas de preço; acima do último, a faixa "inf".
+# Alterá-los exige rodar o comando rebuild_recipe_stats
+PRICE_BUCKETS = (5, 10, 20, 50, 100)
+
+RECIPE_ATTRS = (
+    ('tags', 'tag_id'),
+    ('ingredients', 'ingredient_id'),
+)
+
+
+def price_bucket(price):
+    ''' Nome do contador da faixa de preço '''
+    price = Decimal(str(price))
+    for bound in PRICE_BUCKETS:
+        if price <= bound:
+            return f'price:{bound}'
+
+    return 'price:inf'
+
+
+def recipe_deltas(rows, sign=1):
+    ''' Variação dos contadores ao incluir (ou remover, com sign=-1) Recipes
+    com os (time_minutes, price) informados '''
+    deltas = Counter()
+    for time_minutes, price in rows:
+        deltas['recipes'] += sign
+        deltas['time_minutes'] += sign * time_minutes
+        deltas[price_bucket(price)] += sign
+
+    return deltas
+
+
+def update_recipe_counters(user_id, deltas, create=True):
+    ''' Aplica as variações aos contadores do usuário em um único comando
+
+    Com create=False os contadores ausentes não são criados, o que evita
+    recriá-los durante a remoção em cascata do próprio usuário.
+    '''
+    rows = [(name, value) for name, value in deltas.items() if value]
+    if not rows:
+        return
+
+    table = connection.ops.quote_name(RecipeCounter._meta.db_table)
+    if create:
+        sql = (
+            f'INSERT INTO {table} (user_id, name, value) VALUES '
+            + ', '.join(['(%s, %s, %s)'] * len(rows))
+            + f' ON CONFLICT (user_id, name) '
+            f'DO UPDATE SET value = {table}.value + EXCLUDED.value'
+        )
+        params = [param for row in rows for param in (user_id, *row)]
+    else:
+        sql = (
+            f'UPDATE {table} SET value = {table}.value + delta.value FROM '
+            f'(VALUES ' + ', '.join(['(%s, %s)'] * len(rows)) + ') '
+            f'AS delta (name, value) '
+            f'WHERE {table}.user_id = %s AND {table}.name = delta.name'
+        )
+        params = [param for row in rows for param in row] + [user_id]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _attr_through(recipe_model, model):
+    ''' Tabela intermediária e coluna da relação de Recipe com model '''
+    for field, column in RECIPE_ATTRS:
+        through = recipe_model._meta.get_field(field).remote_field.through
+        if through._meta.get_field(column).related_model is model:
+            return through, column
+
+
+def refresh_attr_counts(model, ids=None, recipe_model=Recipe):
+    ''' Recalcula o recipe_count das Tags/Ingredients informadas (ou de
+    todas, com ids=None) em um único UPDATE '''
+    queryset = model.objects.all()
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return
+        queryset = queryset.filter(pk__in=ids)
+
+    through, column = _attr_through(recipe_model, model)
+    queryset.update(recipe_count=Coalesce(
+        Subquery(
+            through.objects.filter(**{column: OuterRef('pk')})
+            .order_by()
+            .values(column)
+            .annotate(count=Count('*'))
+            .values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    ))
+
+
+def rebuild_stats(user_ids=None, get_model=global_apps.get_model):
+    ''' Recalcula todos os contadores dos usuários informados (ou de todos)
+
+    get_model permite usar os models históricos em migrations.
+    '''
+    Recipe = get_model('core', 'Recipe')
+    RecipeCounter = get_model('core', 'RecipeCounter')
+
+    recipes = Recipe.objects.all()
+    counters = RecipeCounter.objects.all()
+    if user_ids is not None:
+        recipes = recipes.filter(user_id__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+
+    aggregates = {
+        'recipes': Count('id'),
+        'time_minutes': Coalesce(Sum('time_minutes'), 0),
+    }
+    lower = None
+    for bound in PRICE_BUCKETS + (None,):
+        condition = Q()
+        if lower is not None:
+            condition &= Q(price__gt=lower)
+        if bound is not None:
+            condition &= Q(price__lte=bound)
+        aggregates[f'price:{bound or "inf"}'] = Count('id', filter=condition)
+        lower = bound
+
+    with transaction.atomic():
+        counters.delete()
+        rows = recipes.order_by().values('user_id').annotate(**aggregates)
+        RecipeCounter.objects.bulk_create(
+            RecipeCounter(user_id=row['user_id'], name=name, value=row[name])
+            for row in rows
+            for name in aggregates if row[name]
+        )
+
+        for field, _ in RECIPE_ATTRS:
+            model = Recipe._meta.get_field(field).related_model
+            queryset = model.objects.all()
+            if user_ids is not None:
+                queryset = queryset.filter(user_id__in=user_ids)
+            refresh_attr_counts(
+                model,
+                queryset.values_list('pk', flat=True)
+                if user_ids is not None else None,
+                Recipe
+            )
+
+
+def recipe_stats(user):
+    ''' Estatísticas das Recipes do usuário, lidas dos contadores '''
+    counters = dict(
+        RecipeCounter.objects.filter(user=user).values_list('name', 'value')
+    )
+    recipes = counters.get('recipes', 0)
+    attrs = {
+        field: list(
+            model.objects.filter(user=user)
+            .order_by('-recipe_count', 'name')
+            .values('id', 'name', recipes=F('recipe_count'))
+        )
+        for field, model in (('tags', Tag), ('ingredients', Ingredient))
+    }
+
+    average_time = counters.get('time_minutes', 0) / recipes \
+        if recipes else None
+
+    return {
+        'recipes': recipes,
+        'average_time_minutes': average_time,
+        'price_distribution': [
+            {
+                'max_price': bound,
+                'recipes': counters.get(f'price:{bound or "inf"}', 0)
+            }
+            for bound in PRICE_BUCKETS + (None,)
+        ],
+        **attrs
+    }
@@ -0,0 +1,52 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    ''' Storage que nomeia os arquivos pelo hash SHA-256 do seu conteúdo
+
+    Uploads com conteúdo idêntico resolvem para o mesmo arquivo, que só é
+    gravado uma vez. Arquivos sem referência são removidos pelo comando
+    gc_recipe_images.
+    '''
+
+    def save(self, name, content, max_length=None):
+        ''' Salva o conteúdo, reaproveitando um arquivo idêntico existente '''
+        if name is None:
+            name = content.name
+
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Renova o mtime para que o gc_recipe_images trate o arquivo
+            # reaproveitado como um upload recente
+            try:
+                os.utime(self.path(name))
+            except FileNotFoundError:
+                return super().save(name, content, max_length)
+            return name
+
+        return super().save(name, content, max_length)
+
+    def content_name(self, name, content):
+        ''' Gera o caminho <dir>/<hh>/<sha256>.<ext> para o conteúdo '''
+        digest = getattr(content, 'content_hash', None) or \
+            self._hash(content)
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+
+        return os.path.join(directory, digest[:2], f'{digest}{ext}')
+
+    def _hash(self, content):
+        ''' Calcula o hash lendo o conteúdo em chunks '''
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        content.seek(0)
+
+        return sha256.hexdigest()
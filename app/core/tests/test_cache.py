@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+
+from core.cache import LRUCache
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.cache = LRUCache(max_size=2, ttl=10, timer=lambda: self.now)
+
+    def test_get_and_set(self):
+        ''' Teste de leitura de um valor armazenado '''
+        self.cache.set('a', 1)
+
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+
+    def test_expired_values(self):
+        ''' Teste de expiração dos valores pelo TTL '''
+        self.cache.set('a', 1)
+        self.now = 10
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_evicted(self):
+        ''' Teste de remoção do item menos usado recentemente '''
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 3)
+
+    def test_delete(self):
+        ''' Teste de remoção de uma chave '''
+        self.cache.set('a', 1)
+        self.cache.delete('a')
+        self.cache.delete('missing')
+
+        self.assertIsNone(self.cache.get('a'))
@@ -1,25 +1,330 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
 from unittest.mock import patch
 
-from django.test import TestCase
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.core.management import call_command, CommandError
 from django.db.utils import OperationalError
+from django.utils import timezone
+
+from core.models import Tag, Recipe, ImportCheckpoint, AuthToken, \
+                        RecipeCounter
+from core.search import search_recipes
+
+
+ENSURE_CONNECTION = \
+    'django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection'
 
 
 class CommandsTestCase(TestCase):
 
-    def test_wait_for_db_ready(self):
+    @patch('time.sleep', return_value=None)
+    def test_wait_for_db_ready(self, ts):
         ''' Teste de conexão do banco de dados '''
+        out = io.StringIO()
+        call_command('wait_for_db', stdout=out)
 
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        ts.assert_not_called()
+        self.assertIn('Database available!', out.getvalue())
 
-    @patch('time.sleep', return_value=None)    
+    @patch('time.sleep', return_value=None)
     def test_wait_for_db(self, ts):
         ''' Teste para aguardar a conexção com o banco de dados '''
+        failures = [OperationalError] * 5
+
+        def ensure_connection():
+            if failures:
+                raise failures.pop()
+
+        with patch(ENSURE_CONNECTION, side_effect=ensure_connection):
+            call_command('wait_for_db', stdout=io.StringIO())
+
+        # Backoff exponencial com jitter, limitado a --max-delay
+        delays = [call[0][0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        for attempt, delay in enumerate(delays):
+            self.assertLessEqual(delay, min(5, 0.1 * 2 ** attempt))
+
+    def test_wait_for_db_timeout(self):
+        ''' Teste de erro quando o BD não fica disponível no timeout '''
+        clock = [0]
+
+        def sleep(delay):
+            clock[0] += delay
+
+        with patch(ENSURE_CONNECTION, side_effect=OperationalError), \
+                patch('time.sleep', side_effect=sleep), \
+                patch('time.monotonic', side_effect=lambda: clock[0]):
+            with self.assertRaisesMessage(CommandError, 'after 3 seconds'):
+                call_command('wait_for_db', timeout=3, stdout=io.StringIO())
+
+        self.assertAlmostEqual(clock[0], 3)
+
+    @patch('time.sleep', return_value=None)
+    def test_wait_for_db_migrations(self, ts):
+        ''' Teste de espera pelas migrations pendentes '''
+        plan = 'django.db.migrations.executor.MigrationExecutor.migration_plan'
+
+        with patch(ENSURE_CONNECTION), patch(plan) as mp:
+            mp.side_effect = [['0010'], ['0010'], []]
+            out = io.StringIO()
+            call_command('wait_for_db', wait_for_migrations=True, stdout=out)
+
+        self.assertEqual(mp.call_count, 3)
+        self.assertIn('1 unapplied migrations', out.getvalue())
+
+
+class GcRecipeImagesTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_gc_recipe_images(self):
+        ''' Teste de remoção somente das imagens sem referência '''
+        user = get_user_model().objects.create_user('gc@email.com', 'senha123')
+        recipe = Recipe.objects.create(
+            user=user,
+            title='Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.image.save('image.png', ContentFile(b'in use'))
+        orphan = default_storage.save(
+            'uploads/recipe/image.png',
+            ContentFile(b'orphan')
+        )
+
+        call_command('gc_recipe_images', '--grace-minutes=0',
+                     stdout=io.StringIO())
+
+        self.assertTrue(default_storage.exists(recipe.image.name))
+        self.assertFalse(default_storage.exists(orphan))
+
+    def test_gc_recipe_images_rechecks_references(self):
+        ''' Teste de que um arquivo referenciado após a leitura inicial das
+        referências não é removido '''
+        user = get_user_model().objects.create_user('gc@email.com', 'senha123')
+        recipe = Recipe.objects.create(
+            user=user,
+            title='Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.image.save('image.png', ContentFile(b'in use'))
+
+        with patch(
+                'core.management.commands.gc_recipe_images.Command.'
+                '_referenced_files',
+                return_value=set()):
+            call_command('gc_recipe_images', '--grace-minutes=0',
+                         stdout=io.StringIO())
+
+        self.assertTrue(default_storage.exists(recipe.image.name))
+
+    def test_gc_recipe_images_grace_period(self):
+        ''' Teste de que imagens recentes não são removidas '''
+        orphan = default_storage.save(
+            'uploads/recipe/image.png',
+            ContentFile(b'uploading')
+        )
+
+        call_command('gc_recipe_images', stdout=io.StringIO())
+
+        self.assertTrue(os.path.exists(default_storage.path(orphan)))
+
+
+class ImportRecipesTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'import@email.com',
+            'senha123'
+        )
+        self.other = get_user_model().objects.create_user(
+            'other@email.com',
+            'senha123'
+        )
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_import_ndjson(self):
+        ''' Teste de importação de NDJSON, reaproveitando Tags pelo nome '''
+        rows = [
+            {'title': 'Bolo', 'time_minutes': 30, 'price': '12.50',
+             'tags': ['Vegan', 'Dessert'], 'ingredients': [{'name': 'Farinha'}]},
+            {'title': 'Salada', 'time_minutes': 5, 'price': 7,
+             'tags': ['Vegan', 'Vegan'], 'ingredients': []},
+            {'user': 'other@email.com', 'title': 'Sopa', 'time_minutes': 20,
+             'price': 9, 'tags': ['Vegan']},
+        ]
+        path = self.write(
+            'recipes.ndjson',
+            '\n'.join(json.dumps(row) for row in rows)
+        )
+
+        call_command('import_recipes', path, user='import@email.com',
+                     batch_size=2, stdout=io.StringIO())
+
+        bolo = Recipe.objects.get(title='Bolo')
+        self.assertEqual(bolo.user, self.user)
+        self.assertEqual(str(bolo.price), '12.50')
+        self.assertEqual(
+            sorted(bolo.tags.values_list('name', flat=True)),
+            ['Dessert', 'Vegan']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            list(Recipe.objects.get(title='Salada').tags.all()),
+            [self.vegan]
+        )
+        sopa = Recipe.objects.get(title='Sopa')
+        self.assertEqual(sopa.user, self.other)
+        self.assertNotEqual(sopa.tags.get(), self.vegan)
+        self.assertEqual(
+            list(search_recipes(Recipe.objects.all(), 'farinha')),
+            [bolo]
+        )
+
+    def test_import_csv_resume(self):
+        ''' Teste de importação de CSV continuando do último lote salvo '''
+        path = self.write(
+            'recipes.csv',
+            'title,time_minutes,price,link,tags,ingredients\n'
+            'Bolo,30,12.50,,Vegan;Dessert,Farinha\n'
+            'Salada,5,7.00,,Vegan,\n'
+            'Sopa,20,9.00,https://example.com,,Cenoura\n'
+        )
+        ImportCheckpoint.objects.create(source=path, rows=1)
+
+        call_command('import_recipes', path, user='import@email.com',
+                     resume=True, stdout=io.StringIO())
+
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('title', flat=True)),
+            ['Salada', 'Sopa']
+        )
+        self.assertEqual(ImportCheckpoint.objects.get(source=path).rows, 3)
+        self.assertEqual(
+            RecipeCounter.objects.get(user=self.user, name='recipes').value,
+            2
+        )
+        self.assertEqual(Tag.objects.get(pk=self.vegan.pk).recipe_count, 1)
+        self.assertEqual(
+            Recipe.objects.get(title='Sopa').link,
+            'https://example.com'
+        )
+
+    def test_import_duplicate_names_use_lowest_pk(self):
+        ''' Teste de que nomes duplicados resolvem para a mesma Tag usada
+        pela API em lote (a de menor pk) '''
+        Tag.objects.create(user=self.user, name='Vegan')
+        path = self.write('recipes.ndjson', json.dumps(
+            {'title': 'Bolo', 'time_minutes': 30, 'price': 12,
+             'tags': ['Vegan']}
+        ))
+
+        call_command('import_recipes', path, user='import@email.com',
+                     stdout=io.StringIO())
+
+        self.assertEqual(
+            list(Recipe.objects.get(title='Bolo').tags.all()),
+            [self.vegan]
+        )
+
+    def test_import_invalid_lengths(self):
+        ''' Teste de valores acima do limite das colunas, informando a linha
+        sem importar o lote '''
+        rows = [
+            {'title': 'Bolo', 'time_minutes': 30, 'price': 12},
+            {'title': 'x' * 256, 'time_minutes': 5, 'price': 7},
+        ]
+        path = self.write(
+            'recipes.ndjson',
+            '\n'.join(json.dumps(row) for row in rows)
+        )
+
+        with self.assertRaisesMessage(CommandError, 'Invalid row 2: title'):
+            call_command('import_recipes', path, user='import@email.com',
+                         stdout=io.StringIO())
+
+        path = self.write('tags.ndjson', json.dumps(
+            {'title': 'Bolo', 'time_minutes': 30, 'price': 12,
+             'tags': ['x' * 256]}
+        ))
+        with self.assertRaisesMessage(CommandError, 'Invalid row 1: name'):
+            call_command('import_recipes', path, user='import@email.com',
+                         stdout=io.StringIO())
+        self.assertFalse(Recipe.objects.exists())
+
+
+class PurgeExpiredTokensTests(TestCase):
+
+    def test_purge_expired_tokens(self):
+        ''' Teste de remoção em lotes somente dos tokens expirados '''
+        user = get_user_model().objects.create_user(
+            'token@email.com',
+            'senha123'
+        )
+        expired = timezone.now() - timedelta(minutes=1)
+        for _ in range(5):
+            AuthToken.objects.create(user=user, expires_at=expired)
+        valid = AuthToken.objects.issue(user)
+        out = io.StringIO()
+
+        call_command('purge_expired_tokens', batch_size=2, stdout=out)
+
+        self.assertEqual(list(AuthToken.objects.all()), [valid])
+        self.assertIn('Removed 5 expired tokens', out.getvalue())
+
+
+class RebuildRecipeStatsTests(TestCase):
+
+    def test_rebuild_recipe_stats(self):
+        ''' Teste de recálculo dos contadores de um usuário '''
+        user = get_user_model().objects.create_user(
+            'stats@email.com',
+            'senha123'
+        )
+        tag = Tag.objects.create(user=user, name='Vegan')
+        recipe = Recipe.objects.create(
+            user=user, title='Bolo', time_minutes=40, price=12
+        )
+        recipe.tags.add(tag)
+        RecipeCounter.objects.filter(user=user).update(value=99)
+        Tag.objects.update(recipe_count=7)
+
+        call_command('rebuild_recipe_stats', user=['stats@email.com'],
+                     stdout=io.StringIO())
+
+        self.assertEqual(
+            dict(RecipeCounter.objects.values_list('name', 'value')),
+            {'recipes': 1, 'time_minutes': 40, 'price:20': 1}
+        )
+        self.assertEqual(Tag.objects.get().recipe_count, 1)
 
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
\ No newline at end of file
+    def test_rebuild_recipe_stats_unknown_user(self):
+        ''' Teste de erro para um usuário inexistente '''
+        with self.assertRaises(CommandError):
+            call_command('rebuild_recipe_stats', user=['no@email.com'])
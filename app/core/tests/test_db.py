@@ -0,0 +1,123 @@
+import psycopg2
+
+from django.db import connection
+from django.test import TestCase
+
+from core.db.pool import ConnectionPool, stats
+from core.db.postgresql.base import DatabaseWrapper
+
+
+class ConnectionPoolTests(TestCase):
+    ''' Testes do pool de conexões psycopg2 '''
+
+    def setUp(self):
+        self.params = connection.get_connection_params()
+        self.pool = ConnectionPool(max_size=1, timeout=0.01)
+        stats.reset()
+
+    def tearDown(self):
+        self.pool.close()
+
+    def connect(self):
+        return psycopg2.connect(**self.params)
+
+    def test_reuse(self):
+        ''' Teste de reuso da conexão devolvida ao pool '''
+        conn, reused = self.pool.get(self.connect)
+        self.assertFalse(reused)
+        self.pool.put(conn)
+
+        again, reused = self.pool.get(self.connect)
+
+        self.assertTrue(reused)
+        self.assertIs(again, conn)
+        self.pool.put(again)
+
+    def test_rollback_on_put(self):
+        ''' Teste de rollback de transação aberta ao devolver a conexão '''
+        conn, _ = self.pool.get(self.connect)
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.pool.put(conn)
+
+        self.assertEqual(
+            conn.get_transaction_status(),
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def test_discard_broken(self):
+        ''' Teste de descarte das conexões encerradas '''
+        conn, _ = self.pool.get(self.connect)
+        self.pool.put(conn)
+        conn.close()
+
+        again, reused = self.pool.get(self.connect, health_check=True)
+
+        self.assertFalse(reused)
+        self.assertIsNot(again, conn)
+        self.assertEqual(stats.snapshot()['health_check_failures'], 1)
+        self.pool.put(again)
+
+    def test_exhausted(self):
+        ''' Teste de erro quando todas as conexões estão em uso '''
+        conn, _ = self.pool.get(self.connect)
+
+        with self.assertRaises(psycopg2.OperationalError):
+            self.pool.get(self.connect)
+
+        self.assertEqual(stats.snapshot()['pool_timeouts'], 1)
+        self.pool.put(conn)
+
+
+class DatabaseWrapperTests(TestCase):
+    ''' Testes do backend com pool de conexões '''
+
+    def setUp(self):
+        settings_dict = dict(connection.settings_dict)
+        settings_dict['POOL'] = {'MAX_SIZE': 2, 'TIMEOUT': 1}
+        self.wrapper = DatabaseWrapper(settings_dict, alias='default')
+        stats.reset()
+
+    def tearDown(self):
+        self.wrapper.close()
+        self.wrapper.pool.close()
+
+    def test_connection_returned_to_pool(self):
+        ''' Teste de reuso da conexão física entre ciclos de requisição '''
+        self.wrapper.ensure_connection()
+        raw = self.wrapper.connection
+        self.wrapper.close()
+        self.assertEqual(len(self.wrapper.pool), 1)
+
+        self.wrapper.close_if_unusable_or_obsolete()
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+        self.assertIs(self.wrapper.connection, raw)
+        self.assertEqual(stats.snapshot()['opened'], 1)
+        self.assertEqual(stats.snapshot()['reused'], 1)
+        self.assertEqual(stats.snapshot()['reuse_rate'], 0.5)
+
+    def test_persistent_connection_counted_as_reused(self):
+        ''' Teste da contagem de reuso de conexões persistentes '''
+        self.wrapper.ensure_connection()
+        for _ in range(3):
+            self.wrapper.close_if_unusable_or_obsolete()
+            self.wrapper.ensure_connection()
+
+        self.assertEqual(stats.snapshot()['opened'], 1)
+        self.assertEqual(stats.snapshot()['reused'], 3)
+
+    def test_health_check_reconnects(self):
+        ''' Teste de reconexão quando a conexão persistente foi encerrada '''
+        self.wrapper.health_check_enabled = True
+        self.wrapper.ensure_connection()
+        broken = self.wrapper.connection
+        broken.close()
+
+        self.wrapper.close_if_unusable_or_obsolete()
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+        self.assertIsNot(self.wrapper.connection, broken)
+        self.assertEqual(stats.snapshot()['health_check_failures'], 1)
@@ -0,0 +1,47 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import authenticate, get_user_model, hashers
+from django.test import TestCase, override_settings
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHasherTests(TestCase):
+    ''' Testes dos hashers de senha configuráveis '''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='senha123'
+        )
+
+    def test_iterations_from_settings(self):
+        ''' Teste do custo do PBKDF2 definido nas configurações '''
+        self.assertTrue(
+            self.user.password.startswith('pbkdf2_sha256$1000$')
+        )
+
+    def test_rehash_on_login(self):
+        ''' Teste de atualização do hash no login quando o custo muda '''
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            user = authenticate(username='email@email.com',
+                                password='senha123')
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(user.check_password('senha123'))
+
+    def test_hashing_in_pool(self):
+        ''' Teste de execução do hashing nas threads do pool '''
+        threads = []
+        verify = hashers.PBKDF2PasswordHasher.verify
+
+        def record(hasher, password, encoded):
+            threads.append(threading.current_thread().name)
+            return verify(hasher, password, encoded)
+
+        with patch.object(hashers.PBKDF2PasswordHasher, 'verify', record):
+            self.assertTrue(self.user.check_password('senha123'))
+
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('password-hash'))
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import registry
+from core.models import Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+@override_settings(METRICS_TOKEN='segredo')
+class InstrumentationTests(TestCase):
+    ''' Testes do middleware de instrumentação e do endpoint /metrics '''
+
+    def setUp(self):
+        registry.reset()
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='senha123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Recipe.objects.create(
+            user=self.user,
+            title='Recipe',
+            time_minutes=10,
+            price=5
+        )
+
+    def test_server_timing(self):
+        ''' Teste do header Server-Timing com as consultas ao BD '''
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        timing = res['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="3 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_endpoint(self):
+        ''' Teste das medições por view no formato do Prometheus '''
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer segredo')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = res.content.decode()
+        labels = 'view="recipe:recipe-list",method="GET"'
+        self.assertIn(
+            f'http_request_duration_seconds_count{{{labels}}} 1',
+            content
+        )
+        self.assertIn(f'http_request_db_queries_total{{{labels}}} 3', content)
+        self.assertIn(
+            f'http_responses_total{{{labels},status="200"}} 1',
+            content
+        )
+        self.assertIn('db_connections_reuse_ratio', content)
+
+    def test_streaming_response_metrics(self):
+        ''' Teste de que respostas em streaming são registradas ao fim do
+        envio, com os bytes e as consultas feitas durante o streaming '''
+        res = self.client.get(EXPORT_URL)
+        self.assertTrue(res.streaming)
+        self.assertNotIn('recipe:recipe-export', registry.render())
+
+        with CaptureQueriesContext(connection) as queries:
+            body = b''.join(res.streaming_content)
+
+        content = registry.render()
+        labels = 'view="recipe:recipe-export",method="GET"'
+        self.assertIn(
+            f'http_response_size_bytes_total{{{labels}}} {len(body)}',
+            content
+        )
+        self.assertTrue(queries.captured_queries)
+        self.assertIn(
+            f'http_request_db_queries_total{{{labels}}} '
+            f'{len(queries.captured_queries)}',
+            content
+        )
+
+    def test_metrics_requires_token(self):
+        ''' Teste de acesso ao /metrics somente com o token '''
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with override_settings(METRICS_TOKEN=''):
+            res = self.client.get(
+                METRICS_URL,
+                HTTP_AUTHORIZATION='Bearer segredo'
+            )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -2,6 +2,7 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 
 from core import models
+from core.search import search_recipes
 
 def sample_user(email='test@test.com', password='senhasenhada'):
     ''' Cria um usuário e o retorna '''
@@ -77,3 +78,40 @@ class ModelTests(TestCase):
         )
 
         self.assertEqual(str(recipe), recipe.title)
+
+    def test_recipe_search_vector_updated(self):
+        ''' Testa a atualização do search_vector ao alterar a Recipe '''
+        user = sample_user()
+        recipe = models.Recipe.objects.create(
+            user=user,
+            title='Bolo de cenoura',
+            time_minutes=40,
+            price=12.00
+        )
+        tag = models.Tag.objects.create(user=user, name='Sobremesa')
+        ingredient = models.Ingredient.objects.create(user=user, name='Cenoura')
+
+        def matches(term):
+            return search_recipes(models.Recipe.objects.all(), term).exists()
+
+        self.assertTrue(matches('bolo'))
+        self.assertFalse(matches('sobremesa'))
+
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+        self.assertTrue(matches('sobremesa'))
+        self.assertTrue(matches('cenoura'))
+
+        tag.name = 'Lanche'
+        tag.save()
+        self.assertTrue(matches('lanche'))
+        self.assertFalse(matches('sobremesa'))
+
+        tag.delete()
+        self.assertFalse(matches('lanche'))
+
+        ingredient.recipe_set.clear()
+        recipe.title = 'Bolo de fubá'
+        recipe.save()
+        self.assertTrue(matches('fubá'))
+        self.assertFalse(matches('cenoura'))
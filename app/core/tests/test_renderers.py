@@ -0,0 +1,83 @@
+import datetime
+import io
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import TestCase, override_settings
+
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, StreamingJSONRenderer, orjson
+
+
+SAMPLE = [
+    {
+        'id': 1,
+        'title': 'Pão de queijo \u2028\u2029 ☕',
+        'price': Decimal('5.50'),
+        'created': datetime.datetime(2020, 1, 2, 3, 4, 5, 678901,
+                                     tzinfo=datetime.timezone.utc),
+        'tags': [1, 2],
+        'link': None,
+    },
+    {1: 'chave inteira', 'big': 2 ** 70},
+]
+
+
+@skipIf(orjson is None, 'orjson não instalado')
+class FastJSONRendererTests(TestCase):
+    ''' Testes do renderer e do parser JSON com orjson '''
+
+    def test_same_output_as_drf(self):
+        ''' Teste de saída idêntica ao JSONRenderer do DRF '''
+        for data in (SAMPLE, SAMPLE[0], [], {}):
+            self.assertEqual(
+                FastJSONRenderer().render(data),
+                JSONRenderer().render(data)
+            )
+
+    def test_indented_output(self):
+        ''' Teste de saída indentada pela implementação da stdlib '''
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, 'application/json; indent=4'),
+            JSONRenderer().render(SAMPLE, 'application/json; indent=4')
+        )
+
+    def test_stream_same_as_render(self):
+        ''' Teste de streaming com o mesmo resultado do render '''
+        renderer = StreamingJSONRenderer()
+        for data in (SAMPLE, []):
+            self.assertEqual(
+                b''.join(renderer.render_stream(iter(data))),
+                renderer.render(data)
+            )
+
+    def test_parse(self):
+        ''' Teste de leitura de JSON, inclusive em outros encodings '''
+        parser = FastJSONParser()
+        data = parser.parse(io.BytesIO(b'{"price": 5.5, "title": "P\\u00e3o"}'))
+        latin = parser.parse(
+            io.BytesIO('{"title": "Pão"}'.encode('latin-1')),
+            parser_context={'encoding': 'latin-1'}
+        )
+
+        self.assertEqual(data, {'price': 5.5, 'title': 'Pão'})
+        self.assertEqual(latin, {'title': 'Pão'})
+
+    def test_parse_invalid(self):
+        ''' Teste de erro de leitura para JSON inválido e NaN '''
+        for content in (b'{"title": ', b'{"price": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(content))
+
+    @override_settings(API_JSON_BACKEND='json')
+    def test_stdlib_backend(self):
+        ''' Teste do backend da stdlib configurado em API_JSON_BACKEND '''
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE),
+            JSONRenderer().render(SAMPLE)
+        )
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"price": NaN}'))
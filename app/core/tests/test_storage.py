@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_file_named_by_content_hash(self):
+        ''' Teste de nomeação do arquivo pelo hash do conteúdo '''
+        name = self.storage.save('uploads/image.JPG', ContentFile(b'abc'))
+
+        digest = 'ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad'
+        self.assertEqual(name, f'uploads/ba/{digest}.jpg')
+        self.assertTrue(self.storage.exists(name))
+
+    def test_identical_content_stored_once(self):
+        ''' Teste de deduplicação de conteúdos idênticos '''
+        name1 = self.storage.save('uploads/a.png', ContentFile(b'same'))
+        name2 = self.storage.save('uploads/b.png', ContentFile(b'same'))
+        name3 = self.storage.save('uploads/c.png', ContentFile(b'other'))
+
+        self.assertEqual(name1, name2)
+        self.assertNotEqual(name1, name3)
+        directories, _ = self.storage.listdir('uploads')
+        files = [
+            name for directory in directories
+            for name in self.storage.listdir(f'uploads/{directory}')[1]
+        ]
+        self.assertEqual(len(files), 2)
+
+    def test_identical_content_refreshes_mtime(self):
+        ''' Teste de que reaproveitar um arquivo renova o seu mtime '''
+        name = self.storage.save('uploads/a.png', ContentFile(b'same'))
+        os.utime(self.storage.path(name), (0, 0))
+
+        self.storage.save('uploads/b.png', ContentFile(b'same'))
+
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), 0)
+
+    def test_precomputed_hash_used(self):
+        ''' Teste do uso do hash já calculado durante o upload '''
+        content = ContentFile(b'abc')
+        content.content_hash = 'f' * 64
+
+        name = self.storage.save('uploads/image.png', content)
+
+        self.assertEqual(name, os.path.join('uploads/ff', 'f' * 64 + '.png'))
@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.throttling import TokenBucketStore, CacheTokenBucketStore, \
+                            store
+
+
+TAGS_URL = reverse('recipe:tag-list')
+TOKEN_URL = reverse('user:token')
+
+
+def throttle_rates(**rates):
+    ''' REST_FRAMEWORK com as taxas de throttling informadas '''
+    return {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            'read': None,
+            'write': None,
+            'upload': None,
+            'login': None,
+            **rates
+        }
+    }
+
+
+class TokenBucketStoreTests(TestCase):
+
+    def test_consume_and_refill(self):
+        ''' Teste de consumo da rajada e recarga proporcional ao tempo '''
+        buckets = TokenBucketStore(shards=4)
+
+        for _ in range(3):
+            self.assertEqual(buckets.consume('a', 3, 1, now=0), (True, 0.0))
+        self.assertEqual(buckets.consume('a', 3, 1, now=0), (False, 1.0))
+        self.assertTrue(buckets.consume('b', 3, 1, now=0)[0])
+        self.assertTrue(buckets.consume('a', 3, 1, now=1)[0])
+        self.assertFalse(buckets.consume('a', 3, 1, now=1.5)[0])
+
+    def test_evicts_full_buckets(self):
+        ''' Teste de descarte dos buckets recarregados ao atingir o limite '''
+        buckets = TokenBucketStore(shards=1, max_keys=2)
+        buckets.consume('a', 1, 1, now=0)
+        buckets.consume('b', 1, 1, now=0.5)
+
+        buckets.consume('c', 1, 1, now=1.2)
+
+        self.assertEqual(set(buckets._shards[0][0]), {'b', 'c'})
+
+
+class CacheTokenBucketStoreTests(TestCase):
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_clear_removes_only_own_keys(self):
+        ''' Teste de que clear não remove outras chaves do cache '''
+        cache.set('unrelated', 1)
+        other = CacheTokenBucketStore('default')
+        other.consume('a', 3, 1, now=0)
+        buckets = CacheTokenBucketStore(
+            'default',
+            key_prefix='bench:',
+            track_keys=True
+        )
+        buckets.consume('a', 3, 1, now=0)
+
+        buckets.clear()
+
+        self.assertIsNone(cache.get('bench:a'))
+        self.assertEqual(cache.get('unrelated'), 1)
+        self.assertIsNotNone(cache.get('throttle:a'))
+
+
+class ThrottlingApiTests(TestCase):
+
+    def setUp(self):
+        store.clear()
+        self.user = get_user_model().objects.create_user(
+            'throttle@email.com',
+            'senha123'
+        )
+        self.client = APIClient()
+
+    def tearDown(self):
+        store.clear()
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(read='2/min',
+                                                     write='1/min'))
+    def test_separate_read_write_budgets(self):
+        ''' Teste de limites separados para leitura e escrita '''
+        self.client.force_authenticate(self.user)
+
+        for _ in range(2):
+            res = self.client.get(TAGS_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '30')
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login='2/min'))
+    def test_login_throttled_by_ip(self):
+        ''' Teste de limite de logins por IP '''
+        payload = {'email': 'throttle@email.com', 'password': 'errada'}
+
+        for _ in range(2):
+            self.client.post(TOKEN_URL, payload)
+        res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        res = self.client.post(TOKEN_URL, payload, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login='1/min'))
+    def test_login_ignores_forwarded_for_without_proxy(self):
+        ''' Teste de que o X-Forwarded-For do cliente não troca o IP sem um
+        proxy confiável à frente '''
+        payload = {'email': 'throttle@email.com', 'password': 'errada'}
+        self.client.post(TOKEN_URL, payload, HTTP_X_FORWARDED_FOR='10.0.0.3')
+
+        res = self.client.post(TOKEN_URL, payload,
+                               HTTP_X_FORWARDED_FOR='10.0.0.4')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,178 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    ''' Converte uma taxa no formato do DRF ("100/min") em (capacidade,
+    tokens por segundo); None desabilita o limite '''
+    if rate is None:
+        return None
+
+    num, period = rate.split('/')
+    num = int(num)
+    return num, num / DURATIONS[period[0]]
+
+
+class TokenBucketStore:
+    ''' Token buckets em memória, divididos em shards com locks próprios
+
+    Cada verificação trava só o shard da chave e custa O(1). Um bucket cheio
+    equivale a um ausente, então, ao atingir o limite de chaves, o shard
+    descarta os buckets já recarregados (ou o mais antigo, se não houver).
+    '''
+
+    def __init__(self, shards=64, max_keys=100000):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self.max_keys_per_shard = max(1, max_keys // shards)
+
+    def consume(self, key, capacity, rate, now=None):
+        ''' Consome um token da chave
+
+        Retorna (permitido, segundos até haver um token disponível).
+        '''
+        now = time.monotonic() if now is None else now
+        buckets, lock = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                if len(buckets) >= self.max_keys_per_shard:
+                    self._evict(buckets, now)
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                allowed, wait = True, 0.0
+            else:
+                allowed, wait = False, (1 - tokens) / rate
+
+            # O terceiro item é o instante em que o bucket estará cheio
+            buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            return allowed, wait
+
+    def _evict(self, buckets, now):
+        full = [key for key, bucket in buckets.items() if bucket[2] <= now]
+        for key in full:
+            del buckets[key]
+        if not full:
+            del buckets[next(iter(buckets))]
+
+    def clear(self):
+        for buckets, lock in self._shards:
+            with lock:
+                buckets.clear()
+
+
+class CacheTokenBucketStore:
+    ''' Token buckets em um cache do Django, compartilhados entre processos
+
+    A leitura e a escrita do bucket não são atômicas: requisições simultâneas
+    em processos diferentes podem ultrapassar o limite em alguns tokens.
+
+    Com track_keys, a instância guarda as chaves que gravou para que clear
+    remova somente elas, sem afetar o restante do cache.
+    '''
+    key_prefix = 'throttle:'
+
+    def __init__(self, alias, key_prefix=None, track_keys=False):
+        self.cache = caches[alias]
+        if key_prefix is not None:
+            self.key_prefix = key_prefix
+        self._keys = set() if track_keys else None
+
+    def consume(self, key, capacity, rate, now=None):
+        ''' Consome um token da chave; veja TokenBucketStore.consume '''
+        now = time.time() if now is None else now
+        key = self.key_prefix + key
+        bucket = self.cache.get(key)
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            allowed, wait = True, 0.0
+        else:
+            allowed, wait = False, (1 - tokens) / rate
+
+        # Depois de recarregado, o bucket pode expirar do cache
+        self.cache.set(
+            key,
+            (tokens, now),
+            math.ceil((capacity - tokens) / rate) + 1
+        )
+        if self._keys is not None:
+            self._keys.add(key)
+        return allowed, wait
+
+    def clear(self):
+        ''' Remove os buckets gravados por esta instância (com track_keys) '''
+        if self._keys:
+            self.cache.delete_many(list(self._keys))
+            self._keys.clear()
+
+
+store = TokenBucketStore()
+
+
+def get_store():
+    ''' Store configurado: THROTTLE_CACHE ou o store em memória do processo '''
+    alias = getattr(settings, 'THROTTLE_CACHE', None)
+    return CacheTokenBucketStore(alias) if alias else store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    ''' Limite de requisições por usuário (ou IP, se anônimo) com token bucket
+
+    O escopo é o throttle_scope da view ou, na falta dele, "read" para
+    métodos seguros e "write" para os demais; as taxas ficam em
+    DEFAULT_THROTTLE_RATES. A taxa de cada escopo é também o tamanho da
+    rajada permitida.
+    '''
+
+    def __init__(self):
+        self._wait = None
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+
+        return 'read' if request.method in SAFE_METHODS else 'write'
+
+    def get_cache_key(self, request, scope):
+        user = request.user
+        if user and user.is_authenticated:
+            return f'{scope}:user:{user.pk}'
+
+        return f'{scope}:ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        if rate is None:
+            return True
+
+        capacity, per_second = rate
+        allowed, self._wait = get_store().consume(
+            self.get_cache_key(request, scope),
+            capacity,
+            per_second
+        )
+        return allowed
+
+    def wait(self):
+        return self._wait
@@ -0,0 +1,26 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from core.metrics import registry
+
+
+def metrics(request):
+    ''' Medições do processo no formato texto do Prometheus
+
+    Disponível somente com METRICS_TOKEN configurado, enviado como
+    "Authorization: Bearer <token>".
+    '''
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        raise Http404()
+
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if not hmac.compare_digest(authorization, f'Bearer {token}'):
+        return HttpResponse(status=401)
+
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
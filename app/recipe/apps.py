@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class RecipeConfig(AppConfig):
     name = 'recipe'
+
+    def ready(self):
+        ''' Registra os signals do app '''
+        from recipe import signals  # noqa: F401
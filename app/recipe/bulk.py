@@ -0,0 +1,172 @@
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from core.models import Tag, Ingredient, Recipe
+from core.search import update_search_vectors
+from core.stats import recipe_deltas, refresh_attr_counts, \
+                       update_recipe_counters
+
+from recipe.caching import bump_collection_version
+
+
+RECIPE_FIELDS = ('title', 'time_minutes', 'price', 'link')
+RECIPE_ATTRS = (
+    ('tags', Tag, Recipe.tags.through, 'tag_id'),
+    ('ingredients', Ingredient, Recipe.ingredients.through, 'ingredient_id'),
+)
+
+
+def missing_ids(queryset, items):
+    ''' Retorna os erros por item para IDs que não existem no queryset '''
+    ids = {item['id'] for item in items if 'id' in item}
+    found = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+
+    return [
+        {'id': ['Not found.']} if 'id' in item and item['id'] not in found
+        else {}
+        for item in items
+    ]
+
+
+def _case_update(model, rows, fields):
+    ''' Atualiza várias linhas com valores distintos em um único UPDATE '''
+    updates = {}
+    for field in fields:
+        whens = [
+            When(pk=pk, then=Value(values[field]))
+            for pk, values in rows.items() if field in values
+        ]
+        if whens:
+            updates[field] = Case(
+                *whens,
+                default=F(field),
+                output_field=model._meta.get_field(field)
+            )
+
+    if updates:
+        model.objects.filter(pk__in=rows).update(**updates)
+
+
+def bulk_save_attrs(model, user, items):
+    ''' Cria ou atualiza Tags/Ingredients em lote, retornando-os em ordem '''
+    with transaction.atomic():
+        created = model.objects.bulk_create(
+            model(user=user, name=item['name'])
+            for item in items if 'id' not in item
+        )
+        updated = {item['id']: item for item in items if 'id' in item}
+        _case_update(model, updated, ('name',))
+
+        if updated:
+            through, column = next(
+                (through, column) for _, attr_model, through, column
+                in RECIPE_ATTRS if attr_model is model
+            )
+            update_search_vectors(
+                through.objects.filter(**{f'{column}__in': updated})
+                .values_list('recipe_id', flat=True).distinct()
+            )
+        bump_collection_version(user.pk)
+
+    created = iter(created)
+    ids = [item['id'] if 'id' in item else next(created).pk for item in items]
+    objects = model.objects.in_bulk(ids)
+    return [objects[pk] for pk in ids]
+
+
+def resolve_names(model, user_id, names, known=None):
+    ''' Mapeia nomes para IDs em uma consulta, criando os que não existem
+
+    Como o nome não é único no BD, entre duplicados vale o de menor pk.
+    known é um dicionário de nomes já resolvidos, atualizado e retornado,
+    que evita consultar os mesmos nomes de novo.
+    '''
+    ids = {} if known is None else known
+    names = {name for name in names if name not in ids}
+    if not names:
+        return ids
+
+    for pk, name in model.objects.filter(user_id=user_id, name__in=names) \
+            .order_by('-pk').values_list('pk', 'name'):
+        ids[name] = pk
+
+    missing = [name for name in names if name not in ids]
+    for obj in model.objects.bulk_create(
+            model(user_id=user_id, name=name) for name in missing):
+        ids[obj.name] = obj.pk
+
+    return ids
+
+
+def bulk_save_recipes(user, items):
+    ''' Cria ou atualiza Recipes em lote, com Tags e Ingredients pelo nome
+
+    Todo o lote é salvo em uma transação, com um INSERT por tabela e um
+    UPDATE para as Recipes existentes. Retorna os IDs na ordem dos itens.
+    '''
+    with transaction.atomic():
+        updated = {item['id']: item for item in items if 'id' in item}
+        # Trava as Recipes alteradas (em ordem, evitando deadlocks) para que
+        # os contadores partam dos valores vigentes no UPDATE
+        previous = Recipe.objects.filter(pk__in=updated) \
+            .select_for_update().order_by('pk') \
+            .values_list('pk', 'time_minutes', 'price') if updated else []
+        deltas = recipe_deltas(
+            (item['time_minutes'], item['price'])
+            for item in items if 'id' not in item
+        )
+        for pk, time_minutes, price in previous:
+            deltas.subtract(recipe_deltas([(time_minutes, price)]))
+            deltas.update(recipe_deltas([(
+                updated[pk].get('time_minutes', time_minutes),
+                updated[pk].get('price', price)
+            )]))
+
+        created = Recipe.objects.bulk_create(
+            Recipe(user=user, **{
+                field: item[field]
+                for field in RECIPE_FIELDS if field in item
+            })
+            for item in items if 'id' not in item
+        )
+        _case_update(Recipe, updated, RECIPE_FIELDS)
+
+        created = iter(created)
+        ids = [
+            item['id'] if 'id' in item else next(created).pk
+            for item in items
+        ]
+
+        for field, model, through, column in RECIPE_ATTRS:
+            assigned = [
+                (pk, item[field])
+                for pk, item in zip(ids, items) if field in item
+            ]
+            if not assigned:
+                continue
+
+            name_ids = resolve_names(
+                model,
+                user.pk,
+                (name for _, names in assigned for name in names)
+            )
+            affected = set(name_ids.values())
+            # Somente as Recipes atualizadas que enviaram o campo têm as
+            # associações substituídas; as demais as mantêm
+            replaced_ids = [pk for pk, _ in assigned if pk in updated]
+            if replaced_ids:
+                replaced = through.objects.filter(recipe_id__in=replaced_ids)
+                affected.update(replaced.values_list(column, flat=True))
+                replaced.delete()
+            through.objects.bulk_create(
+                through(recipe_id=pk, **{column: attr_id})
+                for pk, names in assigned
+                for attr_id in {name_ids[name] for name in names}
+            )
+            refresh_attr_counts(model, affected)
+
+        update_search_vectors(ids)
+        update_recipe_counters(user.pk, deltas)
+        bump_collection_version(user.pk)
+
+    return ids
@@ -0,0 +1,109 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _cache():
+    ''' Cache usado para as versões e as respostas das coleções, ou None se
+    o cache de respostas estiver desabilitado
+
+    Um LocMemCache é local a cada processo: com vários workers, a versão
+    incrementada em um deles não chegaria aos demais, que continuariam
+    respondendo com dados e ETags antigos. Por isso ele nunca é usado.
+    '''
+    alias = getattr(settings, 'RECIPE_RESPONSE_CACHE', None)
+    if not alias:
+        return None
+
+    cache = caches[alias]
+    if isinstance(cache, LocMemCache):
+        return None
+    return cache
+
+
+def _version_key(user_id):
+    return f'recipe-collection-version:{user_id}'
+
+
+def get_collection_version(user_id):
+    ''' Retorna a versão atual das coleções do usuário '''
+    version = _cache().get(_version_key(user_id))
+    if version is None:
+        version = _reset_version(user_id)
+
+    return version
+
+
+def _reset_version(user_id):
+    ''' Inicia a versão com o horário atual para nunca repetir uma versão
+    anterior, mesmo que a chave tenha sido removida do cache '''
+    version = time.time_ns()
+    _cache().set(_version_key(user_id), version, None)
+    return version
+
+
+def _bump(user_id):
+    try:
+        _cache().incr(_version_key(user_id))
+    except ValueError:
+        _reset_version(user_id)
+
+
+def bump_collection_version(user_id):
+    ''' Invalida as respostas em cache das coleções do usuário
+
+    A versão é incrementada imediatamente e de novo após o commit, para que
+    uma leitura concorrente não guarde dados ainda não commitados sob a nova
+    versão.
+    '''
+    if _cache() is None:
+        return
+
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+class VersionedListCacheMixin:
+    ''' Cache por usuário da action list, com ETag forte e 304 Not Modified '''
+
+    def list(self, request, *args, **kwargs):
+        ''' Responde a partir do cache enquanto a versão não mudar '''
+        if _cache() is None:
+            return super().list(request, *args, **kwargs)
+
+        uri = request.build_absolute_uri()
+        version = get_collection_version(request.user.pk)
+        digest = hashlib.md5(uri.encode()).hexdigest()
+        etag = quote_etag(f'{version}-{digest}')
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and etag in parse_etags(if_none_match):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = f'recipe-collection:{request.user.pk}:{version}:{digest}'
+            data = _cache().get(key)
+            if data is None:
+                response = super().list(request, *args, **kwargs)
+                # Respostas em streaming não são montadas em memória
+                if not response.streaming:
+                    _cache().set(
+                        key,
+                        response.data,
+                        getattr(settings, 'RECIPE_RESPONSE_CACHE_TIMEOUT', 300)
+                    )
+            else:
+                response = Response(data)
+
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
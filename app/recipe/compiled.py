@@ -0,0 +1,222 @@
+from collections import OrderedDict, defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from core.metrics import serializer_timer
+
+
+class CompiledSerializer:
+    ''' Caminho de leitura compilado de um ModelSerializer
+
+    Gera a mesma saída do serializer a partir de linhas de .values() e de
+    mapas de IDs das relações M2M, sem instanciar models nem percorrer a
+    maquinaria de campos do DRF para cada objeto.
+    '''
+
+    def __init__(self, serializer_class, context=None, **serializer_kwargs):
+        serializer = serializer_class(context=context, **serializer_kwargs)
+        self.model = serializer.Meta.model
+        self.request = (context or {}).get('request')
+        self.columns = []
+        self.fields = []
+        self.relations = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, (serializers.ManyRelatedField,
+                                  serializers.ListSerializer)):
+                nested = None
+                if isinstance(field, serializers.ListSerializer):
+                    nested = CompiledSerializer(type(field.child), context)
+                self.relations.append(
+                    (name, self.model._meta.get_field(field.source), nested)
+                )
+                self.fields.append((name, None, None))
+            else:
+                self.columns.append(field.source)
+                self.fields.append(
+                    (name, field.source, self._converter(field))
+                )
+
+        # O ID é lido mesmo fora da saída: as relações e a paginação por
+        # cursor dependem dele
+        if 'id' not in self.columns:
+            self.columns.append('id')
+
+    def _converter(self, field):
+        ''' Conversão equivalente ao to_representation do campo '''
+        if type(field) in (serializers.CharField, serializers.IntegerField,
+                           serializers.ReadOnlyField):
+            return None
+        if isinstance(field, serializers.FileField):
+            storage = self.model._meta.get_field(field.source).storage
+            return lambda name: self._file_url(storage, name)
+
+        return field.to_representation
+
+    def _file_url(self, storage, name):
+        ''' URL do arquivo, como o FileField do DRF a representaria '''
+        if not name:
+            return None
+
+        url = storage.url(name)
+        if self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+    def serialize(self, rows):
+        ''' Serializa as linhas de .values(columns) '''
+        with serializer_timer():
+            rows = list(rows)
+            ids = [row['id'] for row in rows] if self.relations else []
+            related = {
+                name: self._related_map(m2m, nested, ids)
+                for name, m2m, nested in self.relations
+            }
+
+            return [self.serialize_row(row, related) for row in rows]
+
+    def serialize_iter(self, rows, chunk_size):
+        ''' Serializa as linhas em lotes, com uma consulta por relação em
+        cada lote, gerando os itens conforme são produzidos '''
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield from self.serialize(chunk)
+
+    def serialize_row(self, row, related=None):
+        ''' Serializa uma linha, com as relações já mapeadas por ID '''
+        data = OrderedDict()
+        for name, source, convert in self.fields:
+            if source is None:
+                data[name] = related[name].get(row['id'], [])
+                continue
+
+            value = row[source]
+            if value is not None and convert is not None:
+                value = convert(value)
+            data[name] = value
+
+        return data
+
+    def _related_map(self, m2m, nested, ids):
+        ''' Mapeia cada ID para a lista serializada dos objetos relacionados,
+        ordenados pelo ID, em uma única consulta na tabela intermediária '''
+        through = m2m.remote_field.through
+        source, target = m2m.m2m_column_name(), m2m.m2m_reverse_name()
+        rows = through.objects.filter(**{f'{source}__in': ids}) \
+            .order_by(target)
+        result = defaultdict(list)
+
+        if nested is None:
+            for pk, target_pk in rows.values_list(source, target):
+                result[pk].append(target_pk)
+            return result
+
+        prefix = m2m.m2m_reverse_field_name() + '__'
+        for row in rows.values(source, *(prefix + c for c in nested.columns)):
+            result[row[source]].append(nested.serialize_row({
+                column: row[prefix + column] for column in nested.columns
+            }))
+
+        return result
+
+
+class CompiledReadMixin:
+    ''' Atende list e retrieve pelo CompiledSerializer quando habilitado
+
+    Somente as classes em compiled_serializers são compiladas; as demais
+    actions seguem pelos serializers do DRF.
+    '''
+    compiled_serializers = ()
+
+    def get_serializer_kwargs(self):
+        ''' Argumentos extras dos serializers da action, compilados ou não '''
+        return {}
+
+    def get_compiled_serializer(self):
+        ''' Retorna o serializer compilado da action, se houver '''
+        if not getattr(settings, 'RECIPE_COMPILED_SERIALIZERS', False):
+            return None
+
+        serializer_class = self.get_serializer_class()
+        if serializer_class not in self.compiled_serializers:
+            return None
+
+        return CompiledSerializer(
+            serializer_class,
+            self.get_serializer_context(),
+            **self.get_serializer_kwargs()
+        )
+
+    def get_compiled_queryset(self, compiled):
+        ''' Queryset da view em linhas com somente as colunas serializadas '''
+        return self.filter_queryset(self.get_queryset()) \
+            .prefetch_related(None) \
+            .values(*compiled.columns)
+
+    def list(self, request, *args, **kwargs):
+        compiled = self.get_compiled_serializer()
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = self.get_compiled_queryset(compiled)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page))
+
+        if self._can_stream(request):
+            return self._stream(request, compiled, rows)
+
+        return Response(compiled.serialize(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        compiled = self.get_compiled_serializer()
+        if compiled is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_compiled_queryset(compiled),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+
+        return Response(compiled.serialize([row])[0])
+
+    def _can_stream(self, request):
+        ''' Listas sem paginação são enviadas em partes quando o renderer
+        aceito suporta streaming e a saída não é indentada '''
+        renderer = getattr(request, 'accepted_renderer', None)
+        return hasattr(renderer, 'render_stream') and renderer.get_indent(
+            request.accepted_media_type,
+            self.get_renderer_context()
+        ) is None
+
+    def _stream(self, request, compiled, rows):
+        ''' Resposta gerada em partes, lendo as linhas com um cursor '''
+        chunk_size = getattr(settings, 'API_STREAM_CHUNK_SIZE', 1000)
+        renderer = request.accepted_renderer
+        items = compiled.serialize_iter(
+            rows.iterator(chunk_size=chunk_size),
+            chunk_size
+        )
+
+        return StreamingHttpResponse(
+            renderer.render_stream(
+                items,
+                request.accepted_media_type,
+                self.get_renderer_context()
+            ),
+            content_type=renderer.media_type
+        )
@@ -0,0 +1,144 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+
+from core.models import Recipe, RecipeImageJob, IMAGE_STATUS_PENDING, \
+                        IMAGE_STATUS_PROCESSING, IMAGE_STATUS_READY, \
+                        IMAGE_STATUS_FAILED
+
+
+logger = logging.getLogger(__name__)
+
+VARIANT_SIZES = {
+    'image_thumbnail': (150, 150),
+    'image_medium': (600, 600),
+}
+
+_executor = None
+
+
+def _get_executor():
+    ''' Retorna o pool de workers, criado no primeiro uso '''
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'RECIPE_IMAGE_WORKERS', 2),
+            thread_name_prefix='recipe-image'
+        )
+    return _executor
+
+
+def enqueue_image_processing(recipe):
+    ''' Registra um job para a imagem da Recipe e o envia para o pool '''
+    job = RecipeImageJob.objects.create(recipe=recipe, source=recipe.image.name)
+
+    if getattr(settings, 'RECIPE_IMAGE_PROCESSING_EAGER', False):
+        process_image_job(job.pk)
+    else:
+        transaction.on_commit(
+            lambda: _get_executor().submit(_run_in_worker, job.pk)
+        )
+
+    return job
+
+
+def _run_in_worker(job_id):
+    ''' Executa o job em uma thread do pool, liberando a conexão ao final '''
+    try:
+        process_image_job(job_id)
+    except Exception:
+        logger.exception('Image job %s crashed', job_id)
+    finally:
+        connection.close()
+
+
+def process_image_job(job_id, stale_before=None):
+    ''' Processa um job pendente, retornando True se as variações foram geradas
+
+    Com stale_before, também retoma o job se ele ficou em processamento
+    sem atualizações desde esse instante (ex.: o worker foi encerrado).
+    '''
+    claimable = Q(status__in=(IMAGE_STATUS_PENDING, IMAGE_STATUS_FAILED))
+    if stale_before is not None:
+        claimable |= Q(status=IMAGE_STATUS_PROCESSING,
+                       updated_at__lt=stale_before)
+
+    with transaction.atomic():
+        job = RecipeImageJob.objects.select_for_update(skip_locked=True) \
+            .filter(claimable, pk=job_id) \
+            .first()
+        if job is None:
+            return False
+
+        job.status = IMAGE_STATUS_PROCESSING
+        job.attempts += 1
+        job.save(update_fields=['status', 'attempts', 'updated_at'])
+        Recipe.objects.filter(pk=job.recipe_id, image=job.source) \
+            .update(image_status=IMAGE_STATUS_PROCESSING)
+
+    try:
+        recipe = Recipe.objects.get(pk=job.recipe_id)
+        if recipe.image.name != job.source:
+            # Outra imagem foi enviada; o job mais recente cuidará dela
+            job.status = IMAGE_STATUS_READY
+            job.save(update_fields=['status', 'updated_at'])
+            return False
+
+        _generate_variants(recipe, job.source)
+    except Exception as exc:
+        logger.exception('Failed to process image job %s', job_id)
+        job.status = IMAGE_STATUS_FAILED
+        job.error = str(exc)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        Recipe.objects.filter(pk=job.recipe_id, image=job.source) \
+            .update(image_status=IMAGE_STATUS_FAILED)
+        return False
+
+    job.status = IMAGE_STATUS_READY
+    job.error = ''
+    job.save(update_fields=['status', 'error', 'updated_at'])
+    return True
+
+
+def _generate_variants(recipe, source):
+    ''' Remove os metadados da imagem original e gera as variações '''
+    with recipe.image.open('rb') as image_file:
+        image = Image.open(image_file)
+        image_format = image.format
+        image.load()
+
+    # Recriar a imagem somente a partir dos pixels descarta EXIF, ICC etc.
+    stripped = Image.frombytes(image.mode, image.size, image.tobytes())
+    if image.mode == 'P':
+        stripped.putpalette(image.getpalette())
+
+    name = os.path.basename(source)
+    files = {'image': _save(recipe, 'image', name, stripped, image_format)}
+    for field, size in VARIANT_SIZES.items():
+        variant = stripped.copy()
+        variant.thumbnail(size, Image.LANCZOS)
+        files[field] = _save(recipe, field, name, variant, image_format)
+
+    # Os arquivos substituídos podem ser compartilhados com outras Recipes,
+    # então ficam para o gc_recipe_images em vez de serem removidos aqui
+    Recipe.objects.filter(pk=recipe.pk, image=source).update(
+        image_status=IMAGE_STATUS_READY,
+        **files
+    )
+
+
+def _save(recipe, field, name, image, image_format):
+    ''' Codifica a imagem no formato original e a grava no storage '''
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    file_field = getattr(recipe, field)
+    file_field.save(name, ContentFile(buffer.getvalue()), save=False)
+    return file_field.name
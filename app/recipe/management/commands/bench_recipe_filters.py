@@ -0,0 +1,92 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Tag, Ingredient, Recipe
+
+
+def populate_recipes(email, recipes, attrs, per_recipe):
+    ''' Cria um usuário com Recipes, Tags e Ingredients aleatórios '''
+    user = get_user_model().objects.create_user(email=email)
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f'tag {i}') for i in range(attrs)
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f'ingredient {i}') for i in range(attrs)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(user=user, title=f'recipe {i}', time_minutes=10, price=5)
+        for i in range(recipes)
+    )
+
+    per_recipe = min(per_recipe, attrs)
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipes
+        for tag in random.sample(tags, per_recipe)
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(
+            recipe_id=recipe.id,
+            ingredient_id=ingredient.id
+        )
+        for recipe in recipes
+        for ingredient in random.sample(ingredients, per_recipe)
+    )
+
+    with connection.cursor() as cursor:
+        for model in (Tag, Ingredient, Recipe, Recipe.tags.through,
+                      Recipe.ingredients.through):
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    return user
+
+
+class Command(BaseCommand):
+    ''' Benchmark dos filtros de Recipe por tags/ingredients e assigned_only '''
+
+    help = 'Popula dados temporários e exibe os planos das queries de filtro'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--attrs', type=int, default=200)
+        parser.add_argument('--per-recipe', type=int, default=5)
+
+    def handle(self, *args, **options):
+        ''' Lida com o comando; todos os dados são descartados ao final '''
+        with transaction.atomic():
+            user = populate_recipes(
+                'bench-filters@example.com',
+                options['recipes'],
+                options['attrs'],
+                options['per_recipe']
+            )
+            tag_ids = list(
+                Tag.objects.filter(user=user).values_list('id', flat=True)[:3]
+            )
+            queries = {
+                'recipes?tags=': Recipe.objects.filter(
+                    user=user,
+                    id__in=Recipe.tags.through.objects.filter(
+                        tag_id__in=tag_ids
+                    ).values('recipe_id')
+                ).order_by('-id')[:100],
+                'tags?assigned_only=1': Tag.objects.filter(
+                    user=user,
+                    id__in=Recipe.tags.through.objects.values('tag_id')
+                ).order_by('-name')[:100],
+            }
+
+            for label, queryset in queries.items():
+                start = time.perf_counter()
+                list(queryset)
+                elapsed = (time.perf_counter() - start) * 1000
+                self.stdout.write(self.style.SUCCESS(
+                    f'{label}: {elapsed:.2f}ms'
+                ))
+                self.stdout.write(queryset.explain(analyze=True))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe import serializers
+from recipe.compiled import CompiledSerializer
+from recipe.management.commands.bench_recipe_filters import populate_recipes
+
+
+class Command(BaseCommand):
+    ''' Benchmark dos serializers de leitura contra o caminho compilado '''
+
+    help = 'Compara o tempo de serialização das Recipes em JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000')
+        parser.add_argument('--attrs', type=int, default=50)
+        parser.add_argument('--per-recipe', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        ''' Lida com o comando; todos os dados são descartados ao final '''
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        for size in sizes:
+            with transaction.atomic():
+                user = populate_recipes(
+                    f'bench-serializers-{size}@example.com',
+                    size,
+                    options['attrs'],
+                    options['per_recipe']
+                )
+                queryset = Recipe.objects.filter(user=user).order_by('-id')
+
+                for serializer_class in (serializers.RecipeSerializer,
+                                         serializers.RecipeDetailSerializer):
+                    self._compare(
+                        queryset,
+                        serializer_class,
+                        size,
+                        options['repeat']
+                    )
+
+                transaction.set_rollback(True)
+
+    def _compare(self, queryset, serializer_class, size, repeat):
+        ''' Mede os dois caminhos e confere se o JSON gerado é o mesmo '''
+        fields = ('id', 'name') \
+            if serializer_class is serializers.RecipeDetailSerializer \
+            else ('id',)
+
+        def model_path():
+            recipes = queryset.defer('search_vector').prefetch_related(
+                Prefetch('tags', Tag.objects.only(*fields).order_by('id')),
+                Prefetch(
+                    'ingredients',
+                    Ingredient.objects.only(*fields).order_by('id')
+                )
+            )
+            return serializer_class(recipes, many=True, context={}).data
+
+        def compiled_path():
+            compiled = CompiledSerializer(serializer_class, {})
+            return compiled.serialize(queryset.values(*compiled.columns))
+
+        results = {}
+        for label, path in (('serializer', model_path),
+                            ('compiled', compiled_path)):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                content = JSONRenderer().render(path())
+                timings.append((time.perf_counter() - start) * 1000)
+            results[label] = (min(timings), content)
+
+        if results['serializer'][1] != results['compiled'][1]:
+            raise CommandError(
+                f'{serializer_class.__name__}: compiled output differs'
+            )
+
+        baseline, compiled = results['serializer'][0], results['compiled'][0]
+        self.stdout.write(self.style.SUCCESS(
+            f'{serializer_class.__name__} x {size}: '
+            f'serializer {baseline:.1f}ms, compiled {compiled:.1f}ms '
+            f'({baseline / compiled:.1f}x)'
+        ))
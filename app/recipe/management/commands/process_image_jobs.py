@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import RecipeImageJob, IMAGE_STATUS_PENDING, \
+                        IMAGE_STATUS_PROCESSING, IMAGE_STATUS_FAILED
+
+from recipe.image_processing import process_image_job
+
+
+class Command(BaseCommand):
+    ''' Processa jobs de imagem pendentes, como os deixados por um restart '''
+
+    help = 'Processa os jobs de imagem pendentes e reprocessa os que falharam'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-attempts', type=int, default=3)
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=settings.RECIPE_IMAGE_JOB_TIMEOUT,
+            help='Segundos sem atualização para retomar um job em '
+                 'processamento'
+        )
+
+    def handle(self, *args, **options):
+        ''' Lida com o comando '''
+        stale_before = timezone.now() - timedelta(seconds=options['timeout'])
+        job_ids = RecipeImageJob.objects.filter(
+            Q(status=IMAGE_STATUS_PENDING) |
+            Q(status=IMAGE_STATUS_FAILED,
+              attempts__lt=options['max_attempts']) |
+            Q(status=IMAGE_STATUS_PROCESSING,
+              updated_at__lt=stale_before,
+              attempts__lt=options['max_attempts'])
+        ).order_by('created_at').values_list('pk', flat=True)
+
+        processed = failed = 0
+        for job_id in job_ids:
+            if process_image_job(job_id, stale_before):
+                processed += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} image jobs ({failed} skipped or failed)'
+        ))
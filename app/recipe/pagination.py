@@ -0,0 +1,32 @@
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+    ''' Paginação por cursor (keyset) sobre uma ordenação estável '''
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    unpaginated_query_param = 'paginate'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ''' Pagina o queryset, exceto quando o cliente pede ?paginate=false '''
+        if request.query_params.get(self.unpaginated_query_param) == 'false':
+            return None
+
+        return super().paginate_queryset(queryset, request, view)
+
+
+class RecipeCursorPagination(CursorPagination):
+    ''' Paginação de Recipes, da mais recente para a mais antiga '''
+    ordering = '-id'
+
+
+class RecipeAttrCursorPagination(CursorPagination):
+    ''' Paginação de Tags e Ingredients pelo nome '''
+    ordering = '-name'
+
+
+class RecipeSearchPagination(pagination.LimitOffsetPagination):
+    ''' Paginação por offset das buscas, ordenadas por relevância '''
+    default_limit = 100
+    max_limit = 1000
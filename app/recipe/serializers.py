@@ -1,41 +1,123 @@
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from core.metrics import TimedSerializerMixin, TimedListSerializer
 from core.models import Tag, Ingredient, Recipe
 
 
-class TagSerializer(serializers.ModelSerializer):
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    ''' ManyRelatedField que resolve todos os IDs de uma só vez '''
+
+    def to_internal_value(self, data):
+        ''' Valida a lista e a resolve com uma única consulta '''
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        return self.child_relation.to_internal_value_many(data)
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    ''' Relação por PK restrita aos objetos do usuário da requisição '''
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        ''' Restringe o queryset aos objetos do usuário autenticado '''
+        return super().get_queryset().filter(user=self.context['request'].user)
+
+    def to_internal_value_many(self, data):
+        ''' Resolve a lista de PKs com um id__in, reportando todos os erros '''
+        pks, errors = [], []
+        for item in data:
+            try:
+                pk = self.pk_field.to_internal_value(item) \
+                    if self.pk_field is not None else int(item)
+            except (TypeError, ValueError):
+                errors.append(self.error_messages['incorrect_type'].format(
+                    data_type=type(item).__name__
+                ))
+            else:
+                if pk not in pks:
+                    pks.append(pk)
+
+        objects = self.get_queryset().only('pk').in_bulk(pks)
+        errors += [
+            self.error_messages['does_not_exist'].format(pk_value=pk)
+            for pk in pks if pk not in objects
+        ]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        # As instâncias já carregadas alimentam o set() do M2M
+        return [objects[pk] for pk in pks]
+
+
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     ''' Serializer para o modelo de Tag '''
 
     class Meta:
         model = Tag
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'name')
         read_only_fields = ('id',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin,
+                           serializers.ModelSerializer):
     ''' Serializer para o modelo de Ingredient '''
 
     class Meta:
         model = Ingredient
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'name')
         read_only_fields =  ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    ''' Permite restringir os campos (fields) e trocar relações por PK pelos
+    objetos aninhados (expand), conforme o mapa expandable '''
+    expandable = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+
+        for name in expand:
+            self.fields[name] = self.expandable[name](many=True, read_only=True)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(SparseFieldsMixin,
+                       TimedSerializerMixin,
+                       serializers.ModelSerializer):
     ''' Serializer par ao model de Recipe '''
+    expandable = {
+        'ingredients': IngredientSerializer,
+        'tags': TagSerializer,
+    }
 
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
 
     class Meta:
         model = Recipe
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'title', 'ingredients', 'tags', 'time_minutes', 'price', 'link')
         read_only_fields = ('id',)
 
@@ -45,11 +127,52 @@ class RecipeDetailSerializer(RecipeSerializer):
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
 
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + (
+            'image', 'image_thumbnail', 'image_medium', 'image_status'
+        )
+        read_only_fields = (
+            'id', 'image', 'image_thumbnail', 'image_medium', 'image_status'
+        )
+
+
+class RecipeExportSerializer(RecipeSerializer):
+    ''' Serializer da exportação de Recipes, com Tags e Ingredients '''
+    ingredients = IngredientSerializer(many=True, read_only=True)
+    tags = TagSerializer(many=True, read_only=True)
+
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     ''' Serializer responsavel por realizar upload de imagens '''
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
-        read_only_fields = ('id',)
\ No newline at end of file
+        fields = ('id', 'image', 'image_thumbnail', 'image_medium',
+                  'image_status')
+        read_only_fields = ('id', 'image_thumbnail', 'image_medium',
+                            'image_status')
+
+
+class BulkRecipeAttrSerializer(serializers.Serializer):
+    ''' Item de criação/atualização em lote de Tags e Ingredients '''
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=255)
+
+
+class BulkRecipeSerializer(serializers.ModelSerializer):
+    ''' Item de criação/atualização em lote de Recipes, com Tags e
+    Ingredients informados pelo nome '''
+    id = serializers.IntegerField(required=False)
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False
+    )
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ('id', 'title', 'ingredients', 'tags', 'time_minutes',
+                  'price', 'link')
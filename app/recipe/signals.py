@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe.caching import bump_collection_version
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def collection_changed(sender, instance, **kwargs):
+    ''' Invalida as coleções em cache do dono do objeto alterado '''
+    bump_collection_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_attrs_changed(sender, instance, action, **kwargs):
+    ''' Invalida as coleções quando Tags/Ingredients são associados '''
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_collection_version(instance.user_id)
@@ -0,0 +1,183 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from core.search import search_recipes
+
+
+RECIPES_BULK_URL = reverse('recipe:recipe-bulk')
+TAGS_BULK_URL = reverse('recipe:tag-bulk')
+INGREDIENTS_BULK_URL = reverse('recipe:ingredient-bulk')
+
+
+class BulkApiTests(TestCase):
+    ''' Testes dos endpoints de criação/atualização em lote '''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='senha123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_tags(self):
+        ''' Teste de criação de Tags em lote '''
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([tag['name'] for tag in res.data], ['Vegan', 'Dessert'])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_update_ingredients(self):
+        ''' Teste de atualização e criação de Ingredients no mesmo lote '''
+        ingredient = Ingredient.objects.create(user=self.user, name='sal')
+        payload = [{'id': ingredient.id, 'name': 'sal grosso'}, {'name': 'pimenta'}]
+
+        res = self.client.post(INGREDIENTS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ingredient.refresh_from_db()
+        self.assertEqual(ingredient.name, 'sal grosso')
+        self.assertEqual(res.data[0]['id'], ingredient.id)
+        self.assertEqual(res.data[1]['name'], 'pimenta')
+
+    def test_bulk_create_recipes(self):
+        ''' Teste de criação de Recipes resolvendo Tags e Ingredients pelo nome '''
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        payload = [
+            {
+                'title': 'Salada',
+                'time_minutes': 5,
+                'price': '10.00',
+                'tags': ['Vegan', 'Lunch'],
+                'ingredients': ['Alface'],
+            },
+            {
+                'title': 'Sopa',
+                'time_minutes': 30,
+                'price': '15.50',
+                'tags': ['Lunch'],
+            },
+        ]
+
+        with self.assertNumQueries(16):
+            res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        salada = Recipe.objects.get(id=res.data[0]['id'])
+        sopa = Recipe.objects.get(id=res.data[1]['id'])
+        lunch = Tag.objects.get(user=self.user, name='Lunch')
+        self.assertEqual(set(salada.tags.all()), {tag, lunch})
+        self.assertEqual(list(sopa.tags.all()), [lunch])
+        self.assertEqual(
+            list(salada.ingredients.values_list('name', flat=True)),
+            ['Alface']
+        )
+        self.assertEqual(res.data[1]['tags'], [lunch.id])
+        self.assertTrue(
+            search_recipes(Recipe.objects.all(), 'alface').exists()
+        )
+
+    def test_bulk_update_recipes(self):
+        ''' Teste de atualização de Recipes existentes em lote '''
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Bolo',
+            time_minutes=40,
+            price=12.00
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Doce'))
+        payload = [{
+            'id': recipe.id,
+            'title': 'Bolo de cenoura',
+            'time_minutes': 50,
+            'price': '14.00',
+            'tags': ['Lanche'],
+        }]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Bolo de cenoura')
+        self.assertEqual(recipe.time_minutes, 50)
+        self.assertEqual(
+            list(recipe.tags.values_list('name', flat=True)),
+            ['Lanche']
+        )
+
+    def test_bulk_update_keeps_omitted_attrs(self):
+        ''' Teste de que um item sem tags mantém as suas, mesmo que outro
+        item do lote envie tags '''
+        doce = Tag.objects.create(user=self.user, name='Doce')
+        bolo = Recipe.objects.create(
+            user=self.user, title='Bolo', time_minutes=40, price=12.00
+        )
+        torta = Recipe.objects.create(
+            user=self.user, title='Torta', time_minutes=30, price=10.00
+        )
+        bolo.tags.add(doce)
+        torta.tags.add(doce)
+        payload = [
+            {'id': bolo.id, 'title': 'Bolo', 'time_minutes': 45,
+             'price': '12.00'},
+            {'id': torta.id, 'title': 'Torta', 'time_minutes': 30,
+             'price': '10.00', 'tags': ['Lanche']},
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(list(bolo.tags.all()), [doce])
+        self.assertEqual(
+            list(torta.tags.values_list('name', flat=True)),
+            ['Lanche']
+        )
+        self.assertEqual(Tag.objects.get(pk=doce.pk).recipe_count, 1)
+
+    def test_bulk_errors_reported_per_item(self):
+        ''' Teste de erros por item sem salvar nenhum item do lote '''
+        other = get_user_model().objects.create_user(
+            email='other@email.com',
+            password='senha123'
+        )
+        foreign = Recipe.objects.create(
+            user=other,
+            title='Alheia',
+            time_minutes=1,
+            price=1
+        )
+        payload = [
+            {'title': 'Válida', 'time_minutes': 5, 'price': '1.00'},
+            {'title': '', 'time_minutes': 5, 'price': '1.00'},
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('title', res.data[1])
+
+        payload = [
+            {'title': 'Válida', 'time_minutes': 5, 'price': '1.00'},
+            {'id': foreign.id, 'title': 'x', 'time_minutes': 5, 'price': '1.00'},
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[1])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_requires_list(self):
+        ''' Teste de rejeição de um payload que não é uma lista '''
+        res = self.client.post(TAGS_BULK_URL, {'name': 'Vegan'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,94 @@
+import io
+from datetime import timedelta
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import models
+
+
+class CommandsTestCase(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='senha123'
+        )
+        self.recipe = models.Recipe.objects.create(
+            user=self.user,
+            title='Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        self.recipe.image.delete()
+        self.recipe.image_thumbnail.delete()
+        self.recipe.image_medium.delete()
+
+    def test_process_image_jobs(self):
+        ''' Teste do processamento de jobs de imagem pendentes '''
+        buffer = io.BytesIO()
+        Image.new('RGB', (20, 20)).save(buffer, format='PNG')
+        self.recipe.image.save('image.png', ContentFile(buffer.getvalue()))
+        job = models.RecipeImageJob.objects.create(
+            recipe=self.recipe,
+            source=self.recipe.image.name
+        )
+
+        call_command('process_image_jobs', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.recipe.refresh_from_db()
+        self.assertEqual(job.status, models.IMAGE_STATUS_READY)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(self.recipe.image_status, models.IMAGE_STATUS_READY)
+        self.assertTrue(self.recipe.image_thumbnail)
+
+    def test_process_image_jobs_resumes_stale(self):
+        ''' Teste de retomada de jobs abandonados em processamento '''
+        buffer = io.BytesIO()
+        Image.new('RGB', (20, 20)).save(buffer, format='PNG')
+        self.recipe.image.save('image.png', ContentFile(buffer.getvalue()))
+        stale, recent = [
+            models.RecipeImageJob.objects.create(
+                recipe=self.recipe,
+                source=self.recipe.image.name,
+                status=models.IMAGE_STATUS_PROCESSING,
+                attempts=1
+            )
+            for _ in range(2)
+        ]
+        models.RecipeImageJob.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        call_command('process_image_jobs', stdout=io.StringIO())
+
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(stale.status, models.IMAGE_STATUS_READY)
+        self.assertEqual(stale.attempts, 2)
+        self.assertEqual(recent.status, models.IMAGE_STATUS_PROCESSING)
+        self.assertEqual(recent.attempts, 1)
+
+    def test_process_image_jobs_failure(self):
+        ''' Teste de job de imagem com arquivo inválido '''
+        self.recipe.image.save('image.png', ContentFile(b'not an image'))
+        job = models.RecipeImageJob.objects.create(
+            recipe=self.recipe,
+            source=self.recipe.image.name
+        )
+
+        with self.assertLogs('recipe.image_processing', 'ERROR'):
+            call_command('process_image_jobs', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, models.IMAGE_STATUS_FAILED)
+        self.assertTrue(job.error)
@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe, IMAGE_STATUS_READY
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    ''' Retorna o URL de um detalhe de Recipe '''
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class CompiledSerializerTests(TestCase):
+    ''' Testes do caminho de leitura compilado '''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='senha123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        tags = [Tag.objects.create(user=self.user, name=f'Tag {i}')
+                for i in range(3)]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ingredient {i}')
+            for i in range(3)
+        ]
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Bolo de cenoura',
+            time_minutes=40,
+            price=12.5,
+            link='https://example.com/bolo'
+        )
+        self.recipe.tags.add(*reversed(tags))
+        self.recipe.ingredients.add(*ingredients[:2])
+        Recipe.objects.create(
+            user=self.user,
+            title='Sem tags',
+            time_minutes=5,
+            price=0
+        )
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            image='uploads/recipe/ab/abc.jpg',
+            image_thumbnail='uploads/recipe/ab/abc-thumbnail.jpg',
+            image_status=IMAGE_STATUS_READY
+        )
+
+    def assertSameJSON(self, url, params=None):
+        ''' Compara o JSON do caminho compilado com o dos serializers '''
+        responses = []
+        for enabled in (True, False):
+            cache.clear()
+            with override_settings(RECIPE_COMPILED_SERIALIZERS=enabled):
+                res = self.client.get(url, params, format='json')
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            responses.append(
+                b''.join(res.streaming_content) if res.streaming
+                else res.content
+            )
+
+        self.assertEqual(responses[0], responses[1])
+
+    def test_recipe_list(self):
+        ''' Teste de JSON idêntico na listagem de Recipes '''
+        self.assertSameJSON(RECIPES_URL)
+        self.assertSameJSON(RECIPES_URL, {'paginate': 'false'})
+        self.assertSameJSON(RECIPES_URL, {'search': 'bolo'})
+
+    def test_recipe_detail(self):
+        ''' Teste de JSON idêntico no detalhe de Recipe, com imagens '''
+        self.assertSameJSON(detail_url(self.recipe.id))
+
+    def test_sparse_fieldsets(self):
+        ''' Teste de JSON idêntico com fields= e expand= '''
+        self.assertSameJSON(RECIPES_URL, {'fields': 'title,price'})
+        self.assertSameJSON(RECIPES_URL, {'expand': 'tags,ingredients'})
+        self.assertSameJSON(
+            RECIPES_URL,
+            {'fields': 'id,tags', 'expand': 'tags', 'paginate': 'false'}
+        )
+        self.assertSameJSON(
+            detail_url(self.recipe.id),
+            {'fields': 'title,image'}
+        )
+
+    def test_attr_lists(self):
+        ''' Teste de JSON idêntico nas listagens de Tags e Ingredients '''
+        self.assertSameJSON(TAGS_URL)
+        self.assertSameJSON(INGREDIENTS_URL, {'assigned_only': 1})
+
+    def test_list_constant_queries(self):
+        ''' Teste do número de queries do caminho compilado '''
+        cache.clear()
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][1]['tags'], sorted(
+            self.recipe.tags.values_list('id', flat=True)
+        ))
+
+    def test_detail_not_found(self):
+        ''' Teste de 404 para Recipes de outro usuário '''
+        other = get_user_model().objects.create_user(
+            email='other@email.com',
+            password='senha123'
+        )
+        recipe = Recipe.objects.create(
+            user=other,
+            title='Outra',
+            time_minutes=5,
+            price=1
+        )
+
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
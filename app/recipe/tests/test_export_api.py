@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+@override_settings(API_STREAM_CHUNK_SIZE=2)
+class RecipeExportApiTests(TestCase):
+    ''' Testes da exportação de Recipes em streaming '''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='senha123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        dessert = Tag.objects.create(user=self.user, name='Dessert')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipes = []
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=5
+            )
+            recipe.tags.add(vegan, dessert)
+            recipe.ingredients.add(salt)
+            self.recipes.append(recipe)
+
+        other = get_user_model().objects.create_user(
+            email='other@email.com',
+            password='senha123'
+        )
+        Recipe.objects.create(user=other, title='Other', time_minutes=1,
+                              price=1)
+
+    def test_export_ndjson(self):
+        ''' Teste da exportação em NDJSON, uma Recipe por linha '''
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertIn('recipes.ndjson', res['Content-Disposition'])
+
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            [recipe.id for recipe in reversed(self.recipes)]
+        )
+        self.assertEqual(
+            [tag['name'] for tag in rows[0]['tags']],
+            ['Vegan', 'Dessert']
+        )
+        self.assertEqual(rows[0]['ingredients'][0]['name'], 'Salt')
+        self.assertEqual(rows[0]['price'], '5.00')
+
+    def test_export_csv(self):
+        ''' Teste da exportação em CSV, com tags e ingredients pelo nome '''
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/csv'))
+
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['title'], 'Recipe 4')
+        self.assertEqual(rows[0]['tags'], 'Vegan;Dessert')
+        self.assertEqual(rows[0]['ingredients'], 'Salt')
+
+    def test_export_queries_per_chunk(self):
+        ''' Teste de uma consulta por relação em cada lote lido do cursor '''
+        res = self.client.get(EXPORT_URL)
+
+        # 1 cursor + 3 lotes de 2 Recipes x 2 relações
+        with self.assertNumQueries(7):
+            b''.join(res.streaming_content)
+
+    def test_export_filtered(self):
+        ''' Teste da exportação com os filtros da listagem '''
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        self.recipes[0].tags.add(tag)
+
+        res = self.client.get(EXPORT_URL, {'tags': tag.id})
+
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['id'], self.recipes[0].id)
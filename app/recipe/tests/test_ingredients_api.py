@@ -5,7 +5,7 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Ingredient
+from core.models import Ingredient, Recipe
 
 from recipe.serializers import IngredientSerializer
 
@@ -48,7 +48,7 @@ class PrivateIngredientTests(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         ''' Teste que valida se os ingredientes listados são de autoria do usuário '''
@@ -63,8 +63,26 @@ class PrivateIngredientTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingrediente_user.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingrediente_user.name)
+
+    def test_retrieve_ingredients_assigned_to_recipes(self):
+        ''' Teste de filtragem dos ingredients atribuídos a alguma Recipe '''
+        ingredient1 = Ingredient.objects.create(user=self.user, name='maçã')
+        ingredient2 = Ingredient.objects.create(user=self.user, name='peru')
+        recipe = Recipe.objects.create(
+            title='Torta de maçã',
+            time_minutes=5,
+            price=10,
+            user=self.user
+        )
+        recipe.ingredients.add(ingredient1)
+
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        names = [ingredient['name'] for ingredient in res.data['results']]
+        self.assertIn(ingredient1.name, names)
+        self.assertNotIn(ingredient2.name, names)
 
     def test_ingredients_created(self):
         ''' Teste que certifica que o ingrediente foi criado pela API '''
@@ -1,12 +1,14 @@
+import json
 import os
 import tempfile
 
 from PIL import Image
 
-from unittest.mock import patch
-
 from django.urls import reverse
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
 from rest_framework import status
@@ -83,7 +85,7 @@ class PrivateRecipeApiTests(TestCase):
         res = self.client.get(RECIPES_URL)
         
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serialized.data)
+        self.assertEqual(res.data['results'], serialized.data)
 
     def test_retrive_recipes_limited_to_user(self):
         ''' Teste de listagem de Recipes do usuário autenticado '''
@@ -101,8 +103,8 @@ class PrivateRecipeApiTests(TestCase):
         res = self.client.get(RECIPES_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
-        self.assertEqual(res.data, serialized.data)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(res.data['results'], serialized.data)
 
     def test_view_recipe_detail(self):
         ''' Teste de apresentação de detalhe de Recipe '''
@@ -169,6 +171,52 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(ingredient1, ingredients)
         self.assertIn(ingredient2, ingredients)
 
+    def test_create_recipe_ingredients_validated_in_batch(self):
+        ''' Teste de validação dos Ingredients com um número fixo de queries '''
+        def create_with_ingredients(count):
+            ingredients = [
+                sample_ingredient(user=self.user, name=f'Ingredient {i}')
+                for i in range(count)
+            ]
+            payload = {
+                'title': 'Recipe',
+                'ingredients': [ingredient.id for ingredient in ingredients],
+                'time_minutes': 10,
+                'price': 5.00
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(RECIPES_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        self.assertEqual(
+            create_with_ingredients(2),
+            create_with_ingredients(30)
+        )
+
+    def test_create_recipe_invalid_tags_reported_together(self):
+        ''' Teste de erro para Tags inexistentes ou de outro usuário '''
+        user_2 = get_user_model().objects.create_user(
+            email='email@teste.com',
+            password='teste1234'
+        )
+        own_tag = sample_tag(user=self.user)
+        foreign_tag = sample_tag(user=user_2)
+        payload = {
+            'title': 'Recipe',
+            'tags': [own_tag.id, foreign_tag.id, 999999],
+            'time_minutes': 10,
+            'price': 5.00
+        }
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['tags']), 2)
+        self.assertIn(str(foreign_tag.id), res.data['tags'][0])
+        self.assertIn('999999', res.data['tags'][1])
+        self.assertFalse(models.Recipe.objects.exists())
+
     def test_patch_update_recipe(self):
         ''' Testa o update de dados de uma Recipe com o verbo HTTP PATCH '''
         recipe = sample_recipe(user=self.user)
@@ -210,17 +258,190 @@ class PrivateRecipeApiTests(TestCase):
         tags = recipe.tags.all()
         self.assertEqual(len(tags), 0)
 
-    @patch('uuid.uuid4')
-    def test_recipe_file_name_uuid(self, mock_uuid):
-        ''' Testa se a imagem é salva no lugar correto '''
-        uuid = 'test-uuid'
-        mock_uuid.return_value = uuid
-        file_path = models.recipe_image_file_path(None, 'myimage.jpg')
+    def test_list_recipes_constant_queries(self):
+        ''' Testa que a listagem de Recipes não executa queries por Recipe '''
+        for i in range(10):
+            recipe = sample_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(sample_tag(user=self.user, name=f'Tag {i}'))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f'Ingredient {i}')
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+
+    def test_view_recipe_detail_constant_queries(self):
+        ''' Testa que o detalhe de Recipe carrega tags e ingredients de uma vez '''
+        recipe = sample_recipe(user=self.user)
+        for i in range(5):
+            recipe.tags.add(sample_tag(user=self.user, name=f'Tag {i}'))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f'Ingredient {i}')
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 5)
+        self.assertEqual(len(res.data['ingredients']), 5)
+
+    def test_recipes_paginated_by_cursor(self):
+        ''' Testa a paginação por cursor da listagem de Recipes '''
+        recipes = [sample_recipe(user=self.user) for _ in range(3)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipes[2].id, recipes[1].id]
+        )
+        self.assertIsNone(res.data['previous'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipes[0].id]
+        )
+        self.assertIsNone(res.data['next'])
+
+    def test_recipes_unpaginated(self):
+        ''' Testa a listagem completa de Recipes com ?paginate=false '''
+        sample_recipe(user=self.user)
+        sample_recipe(user=self.user)
+
+        recipes = models.Recipe.objects.filter(user=self.user).order_by('-id')
+        serialized = RecipeSerializer(recipes, many=True)
+
+        res = self.client.get(RECIPES_URL, {'paginate': 'false'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(
+            json.loads(b''.join(res.streaming_content)),
+            serialized.data
+        )
+
+    def test_recipes_sparse_fields(self):
+        ''' Testa a restrição dos campos retornados com fields= '''
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+
+        for compiled in (True, False):
+            cache.clear()
+            with override_settings(RECIPE_COMPILED_SERIALIZERS=compiled), \
+                    CaptureQueriesContext(connection) as queries:
+                res = self.client.get(RECIPES_URL, {'fields': 'title,price'})
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                res.data['results'],
+                [{'title': recipe.title, 'price': '5.00'}]
+            )
+            select = next(q['sql'] for q in queries
+                          if 'FROM "core_recipe"' in q['sql'])
+            self.assertNotIn('"link"', select)
+            self.assertFalse(any('core_tag' in q['sql'] for q in queries))
+
+    def test_recipes_expand(self):
+        ''' Testa a listagem com Tags e Ingredients aninhados '''
+        recipe = sample_recipe(user=self.user)
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user)
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+
+        res = self.client.get(RECIPES_URL, {'expand': 'tags,ingredients'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'][0]['tags'],
+            [{'id': tag.id, 'name': tag.name}]
+        )
+        self.assertEqual(
+            res.data['results'][0]['ingredients'],
+            [{'id': ingredient.id, 'name': ingredient.name}]
+        )
+
+    def test_recipes_unknown_fields(self):
+        ''' Testa a rejeição de campos desconhecidos em fields e expand '''
+        res = self.client.get(RECIPES_URL, {'fields': 'title,user'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECIPES_URL, {'expand': 'title'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_recipes_by_tags(self):
+        ''' Testa a filtragem de Recipes por Tags '''
+        recipe1 = sample_recipe(user=self.user, title='Curry de legumes')
+        recipe2 = sample_recipe(user=self.user, title='Tahine')
+        recipe3 = sample_recipe(user=self.user, title='Peixe com fritas')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Vegetarian')
+        recipe1.tags.add(tag1)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe2.id, recipe1.id])
+        self.assertNotIn(recipe3.id, ids)
+
+    def test_filter_recipes_by_ingredients(self):
+        ''' Testa a filtragem de Recipes por Ingredients '''
+        recipe1 = sample_recipe(user=self.user, title='Feijão com arroz')
+        recipe2 = sample_recipe(user=self.user, title='Frango ao curry')
+        recipe3 = sample_recipe(user=self.user, title='Bife com cogumelos')
+        ingredient1 = sample_ingredient(user=self.user, name='Feijão')
+        ingredient2 = sample_ingredient(user=self.user, name='Frango')
+        recipe1.ingredients.add(ingredient1)
+        recipe2.ingredients.add(ingredient2)
+        recipe2.ingredients.add(ingredient1)
+
+        res = self.client.get(
+            RECIPES_URL,
+            {'ingredients': f'{ingredient1.id},{ingredient2.id}'}
+        )
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe2.id, recipe1.id])
+        self.assertNotIn(recipe3.id, ids)
+
+    def test_filter_recipes_invalid_ids(self):
+        ''' Testa a filtragem de Recipes com IDs inválidos '''
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+
+    def test_search_recipes(self):
+        ''' Testa a busca textual de Recipes ordenada por relevância '''
+        recipe1 = sample_recipe(user=self.user, title='Salada de frutas')
+        recipe2 = sample_recipe(user=self.user, title='Torta de limão')
+        recipe2.ingredients.add(sample_ingredient(user=self.user, name='Frutas'))
+        recipe3 = sample_recipe(user=self.user, title='Feijoada')
 
-        exe_path = f'uploads/recipe/{uuid}.jpg'
-        self.assertEqual(file_path, exe_path)
+        res = self.client.get(RECIPES_URL, {'search': 'frutas'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe1.id, recipe2.id])
+        self.assertNotIn(recipe3.id, ids)
+
+    def test_recipe_file_name(self):
+        ''' Testa se a imagem é salva no diretório correto '''
+        file_path = models.recipe_image_file_path(None, 'myimage.JPG')
+
+        self.assertEqual(file_path, 'uploads/recipe/image.jpg')
 
 
+@override_settings(RECIPE_IMAGE_PROCESSING_EAGER=True)
 class RecipeImageUploadTests(TestCase):
 
     def setUp(self):
@@ -233,26 +454,112 @@ class RecipeImageUploadTests(TestCase):
         self.recipe = sample_recipe(user=self.user)
 
     def tearDown(self):
+        self.recipe.refresh_from_db()
         self.recipe.image.delete()
+        self.recipe.image_thumbnail.delete()
+        self.recipe.image_medium.delete()
 
-    def test_upload_image_to_recipe(self):
-        ''' Teste de upload de imagem para uma Recipe '''
+    def upload_image(self, size=(10, 10), **save_kwargs):
+        ''' Faz o upload de uma imagem JPEG gerada para a Recipe '''
         url = image_upload_url(self.recipe.id)
         with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
-            img = Image.new('RGB', (10, 10))
-            img.save(ntf, format='JPEG')
+            img = Image.new('RGB', size)
+            img.save(ntf, format='JPEG', **save_kwargs)
             ntf.seek(0)
-            res = self.client.post(url, {'image': ntf}, format='multipart')
-            
+            return self.client.post(url, {'image': ntf}, format='multipart')
+
+    def test_upload_image_to_recipe(self):
+        ''' Teste de upload de imagem para uma Recipe '''
+        res = self.upload_image()
+
         self.recipe.refresh_from_db()
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('image', res.data)
+        self.assertEqual(res.data['image_status'], models.IMAGE_STATUS_PENDING)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_upload_image_generates_variants(self):
+        ''' Teste de geração das variações redimensionadas da imagem '''
+        self.upload_image(size=(1200, 800))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, models.IMAGE_STATUS_READY)
+        with Image.open(self.recipe.image_thumbnail.path) as thumbnail:
+            self.assertEqual(thumbnail.size, (150, 100))
+        with Image.open(self.recipe.image_medium.path) as medium:
+            self.assertEqual(medium.size, (600, 400))
+        with Image.open(self.recipe.image.path) as image:
+            self.assertEqual(image.size, (1200, 800))
+
+        job = self.recipe.image_jobs.get()
+        self.assertEqual(job.status, models.IMAGE_STATUS_READY)
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(res.data['image_status'], models.IMAGE_STATUS_READY)
+        self.assertIn(self.recipe.image_thumbnail.url, res.data['image_thumbnail'])
+
+    def test_upload_image_strips_metadata(self):
+        ''' Teste de remoção dos metadados EXIF da imagem enviada '''
+        self.upload_image(exif=b'Exif\x00\x00II*\x00\x08' + b'\x00' * 9)
+
+        self.recipe.refresh_from_db()
+        with Image.open(self.recipe.image.path) as image:
+            self.assertNotIn('exif', image.info)
+
+    def test_upload_same_image_deduplicated(self):
+        ''' Teste de que imagens idênticas compartilham o mesmo arquivo '''
+        other = sample_recipe(user=self.user)
+        self.upload_image()
+        url = image_upload_url(other.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.client.post(url, {'image': ntf}, format='multipart')
+
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, other.image.name)
+        self.assertEqual(
+            self.recipe.image_thumbnail.name,
+            other.image_thumbnail.name
+        )
+
+    @override_settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_upload_image_too_large(self):
+        ''' Teste de rejeição de upload acima do tamanho máximo '''
+        res = self.upload_image(size=(200, 200), quality=100)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_DIMENSION=50)
+    def test_upload_image_dimensions_too_large(self):
+        ''' Teste de rejeição de imagem com dimensões acima do limite '''
+        res = self.upload_image(size=(100, 20))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_image_leaves_no_staged_files(self):
+        ''' Teste de que o arquivo recebido é movido, sem deixar cópias '''
+        self.upload_image()
+
+        self.recipe.refresh_from_db()
+        directory = os.path.dirname(self.recipe.image.path)
+        staged = [
+            name for name in os.listdir(directory) if '.upload' in name
+        ]
+        self.assertEqual(staged, [])
+
     def test_upload_image_bad_request(self):
         ''' Teste de upload de imagem incorreta '''
         url = image_upload_url(self.recipe.id)
         res = self.client.post(url, {'image': 'nadave'}, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
-
@@ -0,0 +1,129 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class ResponseCacheTests(TestCase):
+    ''' Testes do cache versionado das listagens '''
+
+    def setUp(self):
+        cache.clear()
+        # Um cache em arquivos é compartilhado entre processos, como o
+        # memcached de produção
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        shared = override_settings(
+            CACHES={
+                **settings.CACHES,
+                'shared': {
+                    'BACKEND': 'django.core.cache.backends.filebased.'
+                               'FileBasedCache',
+                    'LOCATION': directory,
+                },
+            },
+            RECIPE_RESPONSE_CACHE='shared'
+        )
+        shared.enable()
+        self.addCleanup(shared.disable)
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='senha123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def test_not_modified(self):
+        ''' Teste de 304 sem consultas ao BD para uma coleção inalterada '''
+        res = self.client.get(RECIPES_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_cached_response(self):
+        ''' Teste de resposta servida do cache sem consultas ao BD '''
+        res = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(RECIPES_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, res.data)
+
+    def test_etag_changes_on_create(self):
+        ''' Teste de invalidação ao criar um objeto do usuário '''
+        etag = self.client.get(TAGS_URL)['ETag']
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_etag_changes_on_m2m_change(self):
+        ''' Teste de invalidação ao associar uma Tag a uma Recipe '''
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        etag = self.client.get(RECIPES_URL)['ETag']
+        self.recipe.tags.add(tag)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['tags'], [tag.id])
+
+    def test_other_users_changes_ignored(self):
+        ''' Teste de que alterações de outro usuário não invalidam o cache '''
+        etag = self.client.get(TAGS_URL)['ETag']
+        other = get_user_model().objects.create_user(
+            email='other@email.com',
+            password='senha123'
+        )
+        Tag.objects.create(user=other, name='Vegan')
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_depends_on_query(self):
+        ''' Teste de ETags distintas para filtros distintos '''
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        res = self.client.get(
+            TAGS_URL,
+            {'assigned_only': 1},
+            HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_local_cache_disabled(self):
+        ''' Teste de que um cache local ao processo não é usado '''
+        with override_settings(RECIPE_RESPONSE_CACHE='default'):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.has_header('ETag'))
@@ -0,0 +1,210 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe, RecipeCounter
+from core.stats import rebuild_stats
+from recipe.bulk import bulk_save_recipes
+
+
+STATS_URL = reverse('recipe:recipe-stats')
+RECIPES_BULK_URL = reverse('recipe:recipe-bulk')
+
+
+class RecipeStatsTests(TestCase):
+    ''' Testes dos contadores e do endpoint de estatísticas '''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='senha123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.lunch = Tag.objects.create(user=self.user, name='Lunch')
+        self.salt = Ingredient.objects.create(user=self.user, name='Sal')
+
+    def snapshot(self):
+        ''' Contadores do usuário e recipe_count de Tags e Ingredients '''
+        return (
+            dict(RecipeCounter.objects.filter(user=self.user)
+                 .exclude(value=0).values_list('name', 'value')),
+            dict(Tag.objects.values_list('name', 'recipe_count')),
+            dict(Ingredient.objects.values_list('name', 'recipe_count')),
+        )
+
+    def assertCountersConsistent(self):
+        ''' Compara os contadores incrementais com um recálculo completo '''
+        incremental = self.snapshot()
+        rebuild_stats()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_counters_follow_changes(self):
+        ''' Teste dos contadores ao criar, alterar e remover Recipes '''
+        bolo = Recipe.objects.create(
+            user=self.user, title='Bolo', time_minutes=40, price=12
+        )
+        sopa = Recipe.objects.create(
+            user=self.user, title='Sopa', time_minutes=20, price=4.5
+        )
+        bolo.tags.add(self.vegan, self.lunch)
+        sopa.tags.add(self.vegan)
+        sopa.ingredients.add(self.salt)
+        self.assertCountersConsistent()
+
+        bolo.price = 150
+        bolo.save()
+        bolo.tags.remove(self.lunch)
+        self.salt.recipe_set.add(bolo)
+        self.assertCountersConsistent()
+
+        sopa.tags.clear()
+        sopa.delete()
+        self.assertCountersConsistent()
+        self.assertEqual(Tag.objects.get(pk=self.vegan.pk).recipe_count, 1)
+
+    def test_bulk_counters(self):
+        ''' Teste dos contadores no caminho de criação/atualização em lote '''
+        recipe = Recipe.objects.create(
+            user=self.user, title='Bolo', time_minutes=40, price=12
+        )
+        recipe.tags.add(self.vegan)
+        payload = [
+            {'id': recipe.id, 'title': 'Bolo', 'time_minutes': 45,
+             'price': '60.00', 'tags': ['Lunch']},
+            {'title': 'Salada', 'time_minutes': 5, 'price': '8.00',
+             'tags': ['Vegan'], 'ingredients': ['Sal']},
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertCountersConsistent()
+
+    def test_stats(self):
+        ''' Teste do endpoint de estatísticas, lido só dos contadores '''
+        bolo = Recipe.objects.create(
+            user=self.user, title='Bolo', time_minutes=40, price=12
+        )
+        sopa = Recipe.objects.create(
+            user=self.user, title='Sopa', time_minutes=20, price=4.5
+        )
+        bolo.tags.add(self.vegan)
+        sopa.tags.add(self.vegan, self.lunch)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipes'], 2)
+        self.assertEqual(res.data['average_time_minutes'], 30)
+        self.assertEqual(
+            [bucket['recipes'] for bucket in res.data['price_distribution']],
+            [1, 0, 1, 0, 0, 0]
+        )
+        self.assertEqual(res.data['tags'], [
+            {'id': self.vegan.id, 'name': 'Vegan', 'recipes': 2},
+            {'id': self.lunch.id, 'name': 'Lunch', 'recipes': 1},
+        ])
+        self.assertEqual(
+            res.data['ingredients'],
+            [{'id': self.salt.id, 'name': 'Sal', 'recipes': 0}]
+        )
+
+    def test_stats_empty(self):
+        ''' Teste do endpoint para um usuário sem Recipes '''
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipes'], 0)
+        self.assertIsNone(res.data['average_time_minutes'])
+
+    def test_delete_user_with_counters(self):
+        ''' Teste de remoção em cascata de um usuário com contadores '''
+        recipe = Recipe.objects.create(
+            user=self.user, title='Bolo', time_minutes=40, price=12
+        )
+        recipe.tags.add(self.vegan)
+
+        self.user.delete()
+
+        self.assertFalse(RecipeCounter.objects.exists())
+
+
+class ConcurrentRecipeCounterTests(TransactionTestCase):
+    ''' Testes dos contadores com alterações simultâneas da mesma Recipe '''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='senha123'
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Bolo', time_minutes=40, price=12
+        )
+
+    def run_concurrently(self, first, second):
+        ''' Executa first em uma transação que só termina depois de second
+        ter começado, partindo os dois do mesmo estado da Recipe '''
+        started = threading.Event()
+
+        def run_first():
+            try:
+                with transaction.atomic():
+                    first()
+                    started.set()
+                    # Mantém a transação aberta enquanto second é executado
+                    worker.join(0.5)
+            finally:
+                started.set()
+                connection.close()
+
+        def run_second():
+            started.wait()
+            try:
+                second()
+            finally:
+                connection.close()
+
+        worker = threading.Thread(target=run_second)
+        worker.start()
+        run_first()
+        worker.join()
+
+    def assertCountersConsistent(self):
+        counters = dict(RecipeCounter.objects.values_list('name', 'value'))
+        rebuild_stats()
+        self.assertEqual(
+            {name: value for name, value in counters.items() if value},
+            dict(RecipeCounter.objects.exclude(value=0)
+                 .values_list('name', 'value'))
+        )
+
+    def test_concurrent_saves(self):
+        ''' Teste de dois saves simultâneos a partir do mesmo estado '''
+        first = Recipe.objects.get(pk=self.recipe.pk)
+        second = Recipe.objects.get(pk=self.recipe.pk)
+        first.price, first.time_minutes = 60, 45
+        second.price, second.time_minutes = 150, 10
+
+        self.run_concurrently(first.save, second.save)
+
+        self.assertCountersConsistent()
+
+    def test_concurrent_bulk_updates(self):
+        ''' Teste de duas atualizações em lote simultâneas '''
+        def update(price, time_minutes):
+            return lambda: bulk_save_recipes(self.user, [{
+                'id': self.recipe.pk, 'title': 'Bolo',
+                'time_minutes': time_minutes, 'price': price,
+            }])
+
+        self.run_concurrently(update(60, 45), update(150, 10))
+
+        self.assertCountersConsistent()
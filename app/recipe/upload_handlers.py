@@ -0,0 +1,148 @@
+import hashlib
+import io
+import os
+import tempfile
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+
+# Bytes lidos no máximo para encontrar o cabeçalho da imagem
+HEADER_MAX_BYTES = 256 * 1024
+
+
+class ImageTooLarge(APIException):
+    ''' Upload de imagem acima do tamanho permitido '''
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('Image exceeds the maximum upload size.')
+    default_code = 'image_too_large'
+
+
+class StagedUploadedFile(TemporaryUploadedFile):
+    ''' Arquivo gravado ao lado do destino final, movido sem cópia ao salvar '''
+
+    def __init__(self, directory, name, content_type, size, charset,
+                 content_type_extra=None):
+        ext = os.path.splitext(name)[1]
+        os.makedirs(directory, exist_ok=True)
+        file = tempfile.NamedTemporaryFile(
+            suffix='.upload' + ext,
+            dir=directory
+        )
+        super(TemporaryUploadedFile, self).__init__(
+            file, name, content_type, size, charset, content_type_extra
+        )
+
+
+class RecipeImageUploadHandler(FileUploadHandler):
+    ''' Valida tamanho e cabeçalho da imagem enquanto o upload é recebido '''
+
+    def __init__(self, request=None, field_name='image',
+                 upload_to='uploads/recipe/'):
+        super().__init__(request)
+        self.image_field_name = field_name
+        self.upload_to = upload_to
+        self.max_size = settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE
+        self.max_dimension = settings.RECIPE_IMAGE_MAX_DIMENSION
+        self.file = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        ''' Rejeita o corpo antes da leitura quando o Content-Length excede '''
+        # Margem para os cabeçalhos multipart e demais campos do formulário
+        if content_length > self.max_size + 64 * 1024:
+            raise ImageTooLarge()
+
+    def new_file(self, field_name, *args, **kwargs):
+        ''' Inicia a gravação do arquivo diretamente no diretório final '''
+        super().new_file(field_name, *args, **kwargs)
+        if field_name != self.image_field_name:
+            return
+
+        self.header = b''
+        self.verified = False
+        self.sha256 = hashlib.sha256()
+        self.file = StagedUploadedFile(
+            self._staging_directory(),
+            self.file_name,
+            self.content_type,
+            0,
+            self.charset,
+            self.content_type_extra
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        ''' Grava o chunk, validando o tamanho e o cabeçalho da imagem '''
+        if self.file is None:
+            return raw_data
+
+        if start + len(raw_data) > self.max_size:
+            self._abort()
+            raise ImageTooLarge()
+
+        if not self.verified:
+            self.header += raw_data
+            self._verify_header(final=len(self.header) >= HEADER_MAX_BYTES)
+
+        self.sha256.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        ''' Retorna o arquivo gravado, pronto para ser movido ao destino '''
+        if self.file is None:
+            return None
+
+        if not self.verified:
+            self._verify_header(final=True)
+
+        self.file.seek(0)
+        self.file.size = file_size
+        # Evita reler o arquivo para calcular o nome no storage
+        self.file.content_hash = self.sha256.hexdigest()
+        file, self.file = self.file, None
+        return file
+
+    def _staging_directory(self):
+        ''' Diretório do storage onde as imagens serão salvas '''
+        try:
+            return default_storage.path(self.upload_to)
+        except NotImplementedError:
+            return settings.FILE_UPLOAD_TEMP_DIR
+
+    def _verify_header(self, final):
+        ''' Lê somente o cabeçalho da imagem, sem decodificar o bitmap '''
+        try:
+            with Image.open(io.BytesIO(self.header)) as image:
+                width, height = image.size
+        except Exception:
+            if not final:
+                return
+            self._abort()
+            raise ValidationError({self.image_field_name: [
+                _('Upload a valid image. The file you uploaded was either '
+                  'not an image or a corrupted image.')
+            ]})
+
+        if max(width, height) > self.max_dimension:
+            self._abort()
+            raise ValidationError({self.image_field_name: [
+                _('Image dimensions may not exceed %(max)spx.')
+                % {'max': self.max_dimension}
+            ]})
+
+        self.verified = True
+        self.header = b''
+
+    def _abort(self):
+        ''' Descarta o arquivo parcialmente gravado '''
+        if self.file is not None:
+            self.file.close()
+            self.file = None
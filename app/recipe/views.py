@@ -1,54 +1,258 @@
+from django.conf import settings
+from django.db.models import Prefetch
+
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from core.models import Tag, Ingredient, Recipe
+from core.models import Tag, Ingredient, Recipe, IMAGE_STATUS_PENDING
+from core.renderers import NDJSONRenderer, CSVRenderer
+from core.search import search_recipes
+from core.stats import recipe_stats
+
+from user.authentication import CachedTokenAuthentication
 
 from recipe import serializers
+from recipe.bulk import bulk_save_attrs, bulk_save_recipes, missing_ids
+from recipe.caching import VersionedListCacheMixin
+from recipe.compiled import CompiledReadMixin, CompiledSerializer
+from recipe.image_processing import enqueue_image_processing
+from recipe.upload_handlers import RecipeImageUploadHandler
+from recipe.pagination import RecipeCursorPagination, \
+                              RecipeAttrCursorPagination, \
+                              RecipeSearchPagination
+
+
+def _validate_bulk(view, request):
+    ''' Valida um lote em uma passada, reportando os erros por item '''
+    if not isinstance(request.data, list):
+        raise ValidationError({'non_field_errors': ['Expected a list of items']})
+    if len(request.data) > settings.RECIPE_BULK_MAX_ITEMS:
+        raise ValidationError({'non_field_errors': [
+            f'Ensure this list has at most {settings.RECIPE_BULK_MAX_ITEMS} items'
+        ]})
+
+    serializer = view.get_serializer(data=request.data, many=True)
+    serializer.is_valid(raise_exception=True)
+    items = serializer.validated_data
+
+    errors = missing_ids(view.get_queryset(), items)
+    if any(errors):
+        raise ValidationError(errors)
+
+    return items
+
 
+def _params_to_ints(param, qs):
+    ''' Converte uma lista de IDs separados por vírgula em inteiros '''
+    try:
+        return [int(str_id) for str_id in qs.split(',')]
+    except ValueError:
+        raise ValidationError({param: 'Expected a comma separated list of ids'})
 
-class BaseRecipeAttrViewset(viewsets.GenericViewSet,
+
+class BaseRecipeAttrViewset(VersionedListCacheMixin,
+                            CompiledReadMixin,
+                            viewsets.GenericViewSet,
                             mixins.ListModelMixin,
                             mixins.CreateModelMixin
                             ):
     ''' Classe base contendo os atributos de name e user '''
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
-    
+    pagination_class = RecipeAttrCursorPagination
+    compiled_serializers = (
+        serializers.TagSerializer,
+        serializers.IngredientSerializer,
+    )
+
     def get_queryset(self):
         ''' Retorna queryset contendo somente referencias do usuário atual '''
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        queryset = self.queryset.filter(user=self.request.user)
+
+        if self.request.query_params.get('assigned_only') in ('1', 'true'):
+            assigned = self.recipe_through.objects.values(self.through_column)
+            queryset = queryset.filter(id__in=assigned)
+
+        return queryset.order_by('-name')
 
     def perform_create(self, serializer):
         ''' Realiza a criação referente ao serializer da classe '''
         serializer.save(user=self.request.user)
-    
+
+    def get_serializer_class(self):
+        ''' Retorna a classe de serializer apropriada '''
+        if self.action == 'bulk':
+            return serializers.BulkRecipeAttrSerializer
+
+        return self.serializer_class
+
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request):
+        ''' Cria ou atualiza (itens com id) vários objetos em uma transação '''
+        items = _validate_bulk(self, request)
+        objects = bulk_save_attrs(
+            self.queryset.model,
+            request.user,
+            items
+        )
+
+        return Response(
+            self.serializer_class(objects, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
 
 class TagViewSet(BaseRecipeAttrViewset):
     ''' Lida com as tags no BD '''
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    recipe_through = Recipe.tags.through
+    through_column = 'tag_id'
 
 
 class IngredientViewSet(BaseRecipeAttrViewset):
     ''' Lida com ingredients no BD '''
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    recipe_through = Recipe.ingredients.through
+    through_column = 'ingredient_id'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(VersionedListCacheMixin,
+                    CompiledReadMixin,
+                    viewsets.ModelViewSet):
     ''' Lida com os recipes no BD '''
 
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+    # Definido por ação (upload_image); sem ele, vale o escopo read/write
+    throttle_scope = None
+    compiled_serializers = (
+        serializers.RecipeSerializer,
+        serializers.RecipeDetailSerializer,
+    )
+    attr_filters = {
+        'tags': (Recipe.tags.through, 'tag_id'),
+        'ingredients': (Recipe.ingredients.through, 'ingredient_id'),
+    }
 
     def get_queryset(self):
         ''' Retorna as Recipes do usuário da requisição '''
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(user=self.request.user) \
+            .defer('search_vector')
+
+        for param in self.attr_filters:
+            queryset = self._filter_by_attr(queryset, param)
+
+        sparse = self.get_serializer_kwargs()
+        fields = sparse.get('fields')
+        relations = tuple(
+            name for name in self.attr_filters
+            if fields is None or name in fields
+        )
+        if fields is not None:
+            queryset = queryset.only('id', *(
+                name for name in fields if name not in self.attr_filters
+            ))
+
+        if self.action == 'retrieve':
+            queryset = self._prefetch_attrs(
+                queryset,
+                ('id', 'name'),
+                relations
+            )
+        elif self.action != 'upload_image':
+            queryset = self._prefetch_attrs(
+                queryset,
+                ('id',),
+                relations,
+                sparse.get('expand', ())
+            )
+
+        search = self.request.query_params.get('search')
+        if search:
+            return search_recipes(queryset, search).order_by('-rank', '-id')
+
+        return queryset.order_by('-id')
+
+    @property
+    def paginator(self):
+        ''' Buscas ranqueadas são paginadas por offset em vez de cursor '''
+        if not hasattr(self, '_paginator') and \
+                self.request.query_params.get('search'):
+            self._paginator = RecipeSearchPagination()
+
+        return super().paginator
+
+    def _filter_by_attr(self, queryset, param):
+        ''' Filtra as Recipes que possuem algum dos IDs informados em param '''
+        value = self.request.query_params.get(param)
+        if not value:
+            return queryset
+
+        through, column = self.attr_filters[param]
+        matching = through.objects.filter(
+            **{f'{column}__in': _params_to_ints(param, value)}
+        ).values('recipe_id')
+
+        return queryset.filter(id__in=matching)
+
+    def _prefetch_attrs(self, queryset, fields,
+                        relations=('tags', 'ingredients'), expand=()):
+        ''' Pré-carrega as relações somente com as colunas usadas (id e name
+        nas expandidas), na mesma ordem (por ID) do caminho compilado '''
+        models = {'tags': Tag, 'ingredients': Ingredient}
+        return queryset.prefetch_related(*(
+            Prefetch(name, queryset=models[name].objects.only(
+                *(('id', 'name') if name in expand else fields)
+            ).order_by('id'))
+            for name in relations
+        ))
+
+    def get_serializer_kwargs(self):
+        ''' Lê fields= e expand= da query string em list e retrieve
+
+        fields restringe os campos retornados (e as colunas lidas do BD);
+        expand=tags,ingredients retorna os objetos no lugar dos IDs.
+        '''
+        if hasattr(self, '_serializer_kwargs'):
+            return self._serializer_kwargs
+
+        kwargs = {}
+        if self.action in ('list', 'retrieve'):
+            serializer_class = self.get_serializer_class()
+            params = (
+                ('fields', serializer_class.Meta.fields),
+                ('expand', serializer_class.expandable),
+            )
+            for param, allowed in params:
+                value = self.request.query_params.get(param)
+                if value is None:
+                    continue
+
+                names = [name for name in value.split(',') if name]
+                unknown = [name for name in names if name not in allowed]
+                if unknown:
+                    raise ValidationError(
+                        {param: f'Unknown fields: {", ".join(unknown)}'}
+                    )
+                kwargs[param] = names
+
+        self._serializer_kwargs = kwargs
+        return kwargs
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(
+            *args,
+            **self.get_serializer_kwargs(),
+            **kwargs
+        )
     
     def get_serializer_class(self):
         ''' Retorna a classe de serializer apropriada '''
@@ -56,16 +260,68 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return serializers.RecipeDetailSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
-        
+        elif self.action == 'bulk':
+            return serializers.BulkRecipeSerializer
+        elif self.action == 'export':
+            return serializers.RecipeExportSerializer
+
         return self.serializer_class
 
     def perform_create(self, serializer):
         ''' Realiza a criação referente ao serializer da classe '''
         serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request):
+        ''' Cria ou atualiza (itens com id) várias Recipes em uma transação '''
+        items = _validate_bulk(self, request)
+        ids = bulk_save_recipes(request.user, items)
+
+        recipes = self._prefetch_attrs(
+            Recipe.objects.filter(pk__in=ids).defer('search_vector'),
+            ('id',)
+        ).in_bulk()
+        return Response(
+            serializers.RecipeSerializer(
+                [recipes[pk] for pk in ids],
+                many=True
+            ).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(methods=['GET'], detail=False,
+            renderer_classes=(NDJSONRenderer, CSVRenderer))
+    def export(self, request):
+        ''' Exporta as Recipes do usuário em NDJSON ou CSV, em streaming '''
+        compiled = CompiledSerializer(
+            self.get_serializer_class(),
+            self.get_serializer_context()
+        )
+        response = self._stream(
+            request,
+            compiled,
+            self.get_compiled_queryset(compiled)
+        )
+        response['Content-Disposition'] = \
+            f'attachment; filename="recipes.{request.accepted_renderer.format}"'
+
+        return response
+
+    @action(methods=['GET'], detail=False)
+    def stats(self, request):
+        ''' Estatísticas das Recipes do usuário: Recipes por Tag e por
+        Ingredient, tempo médio e distribuição de preços
+
+        Lidas dos contadores mantidos em core.stats, sem percorrer as
+        Recipes.
+        '''
+        return Response(recipe_stats(request.user))
+
+    @action(methods=['POST'], detail=True, url_path='upload-image',
+            throttle_scope='upload')
     def upload_image(self, request, pk=None):
-        ''' Upload de imagem para uma Recipe '''
+        ''' Upload de imagem para uma Recipe, processada em segundo plano '''
+        request.upload_handlers = [RecipeImageUploadHandler(request)]
         recipe = self.get_object()
         serializer = self.get_serializer(
             recipe,
@@ -73,10 +329,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            recipe = serializer.save(image_status=IMAGE_STATUS_PENDING)
+            enqueue_image_processing(recipe)
             return Response(
                 serializer.data,
-                status=status.HTTP_200_OK
+                status=status.HTTP_202_ACCEPTED
             )
         
         return Response(
@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.cache import LRUCache
+from core.models import AuthToken
+
+
+class TokenCache:
+    ''' Cache de tokens em dois níveis: LRU local e, opcionalmente, um cache
+    compartilhado do Django
+
+    Cada token é mapeado para (user_id, is_active, expires_at).
+
+    Invalidações removem a chave dos dois níveis; nos demais processos o
+    nível local expira em no máximo TOKEN_AUTH_CACHE_TTL segundos.
+    '''
+    key_prefix = 'auth-token:'
+
+    def __init__(self):
+        self.local = LRUCache(
+            max_size=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000),
+            ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 30)
+        )
+
+    @property
+    def shared(self):
+        ''' Cache compartilhado configurado, se houver '''
+        alias = getattr(settings, 'TOKEN_AUTH_SHARED_CACHE', None)
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        ''' Retorna (user_id, is_active, expires_at) em cache ou None '''
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(self.key_prefix + key)
+            if entry is not None:
+                self.local.set(key, entry)
+
+        return entry
+
+    def set(self, key, entry):
+        ''' Armazena (user_id, is_active, expires_at) nos dois níveis
+
+        Somente esses dados são guardados: nem o hash da senha nem os demais
+        campos do usuário vão para o cache compartilhado.
+        '''
+        self.local.set(key, entry)
+        if self.shared is not None:
+            self.shared.set(
+                self.key_prefix + key,
+                entry,
+                getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 30)
+            )
+
+    def delete(self, key):
+        ''' Invalida o token nos dois níveis do cache '''
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self.key_prefix + key)
+
+    def clear(self):
+        ''' Limpa o nível local do cache '''
+        self.local.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    ''' TokenAuthentication que evita a consulta de Token e User no BD a cada
+    requisição
+
+    Em um hit, o usuário e o token são instâncias com somente a PK (e
+    is_active) carregada; os demais campos são lidos do BD no primeiro
+    acesso. A expiração é verificada no cache, sem escrever no BD.
+    '''
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        ''' Valida o token pelo cache, consultando o BD somente em um miss '''
+        entry = token_cache.get(key)
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            entry = (user.pk, user.is_active, token.expires_at)
+            token_cache.set(key, entry)
+        else:
+            user, token = self.cached_credentials(key, *entry)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        if token.is_expired:
+            token_cache.delete(key)
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+        return user, token
+
+    def cached_credentials(self, key, user_id, is_active, expires_at):
+        ''' Monta usuário e token com campos adiados a partir do cache '''
+        user = get_user_model().from_db(
+            'default',
+            ['id', 'is_active'],
+            [user_id, is_active]
+        )
+        token = self.model.from_db(
+            'default',
+            ['key', 'user_id', 'expires_at'],
+            [key, user_id, expires_at]
+        )
+        token.user = user
+
+        return user, token
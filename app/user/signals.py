@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import AuthToken
+from user.authentication import token_cache
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    ''' Invalida os tokens em cache de um usuário alterado ou removido '''
+    for key in AuthToken.objects.filter(user_id=instance.pk) \
+            .values_list('key', flat=True):
+        token_cache.delete(key)
+
+
+@receiver(post_save, sender=AuthToken)
+@receiver(post_delete, sender=AuthToken)
+def token_changed(sender, instance, **kwargs):
+    ''' Invalida um token alterado ou removido '''
+    token_cache.delete(instance.key)
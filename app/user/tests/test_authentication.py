@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import AuthToken
+from user.authentication import token_cache
+
+
+ME_URL = reverse('user:me')
+ROTATE_URL = reverse('user:token-rotate')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    ''' Testes da autenticação por token com cache '''
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='email@email.com',
+            password='testpass',
+            name='name'
+        )
+        self.token = AuthToken.objects.issue(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_token_skips_database(self):
+        ''' Teste de que um token em cache não consulta o BD; somente o
+        usuário é lido pela view /me/ '''
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deactivated_user_invalidated(self):
+        ''' Teste de invalidação ao desativar o usuário '''
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_invalidated(self):
+        ''' Teste de invalidação ao remover o token '''
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_invalidated(self):
+        ''' Teste de invalidação ao atualizar o perfil pela API '''
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'nome novo'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'nome novo')
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE='default')
+    def test_shared_cache_populates_local(self):
+        ''' Teste de leitura do cache compartilhado após limpar o local '''
+        self.client.get(ME_URL)
+        token_cache.clear()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE='default')
+    def test_shared_cache_stores_no_user_data(self):
+        ''' Teste de que o cache compartilhado não guarda o usuário '''
+        self.client.get(ME_URL)
+
+        entry = cache.get(token_cache.key_prefix + self.token.key)
+
+        self.assertEqual(
+            entry,
+            (self.user.pk, True, self.token.expires_at)
+        )
+
+    def test_update_does_not_revert_newer_data(self):
+        ''' Teste de que atualizar o perfil não sobrescreve dados alterados
+        depois que o token entrou em cache '''
+        self.client.get(ME_URL)
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.set_password('novasenha')
+        # Sem signals, como uma escrita feita por outro processo
+        get_user_model().objects.filter(pk=user.pk).update(
+            password=user.password
+        )
+
+        self.client.patch(ME_URL, {'name': 'nome novo'})
+
+        user.refresh_from_db()
+        self.assertEqual(user.name, 'nome novo')
+        self.assertTrue(user.check_password('novasenha'))
+
+    def test_expired_token_rejected(self):
+        ''' Teste de que um token em cache expirado é recusado sem escrever
+        no BD '''
+        self.client.get(ME_URL)
+        AuthToken.objects.filter(pk=self.token.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        token_cache.clear()
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotate_token(self):
+        ''' Teste de troca do token, revogando o anterior '''
+        self.client.get(ME_URL)
+
+        res = self.client.post(ROTATE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], self.token.key)
+        self.assertFalse(AuthToken.objects.filter(pk=self.token.pk).exists())
+        self.assertEqual(
+            self.client.get(ME_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {res.data["token"]}'
+        )
+        self.assertEqual(
+            self.client.get(ME_URL).status_code,
+            status.HTTP_200_OK
+        )
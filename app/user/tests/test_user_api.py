@@ -70,6 +70,7 @@ class PublicUserAPITests(TestCase):
         create_user(**payload)
         res = self.client.post(TOKEN_URL, payload)
         self.assertIn('token', res.data)
+        self.assertIn('expires_at', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
     
     def test_create_token_invalid_credentials(self):
@@ -1,10 +1,21 @@
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from core.models import AuthToken
+from user.authentication import CachedTokenAuthentication
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
+def token_response_data(token):
+    ''' Corpo da resposta com um token emitido '''
+    return {'token': token.key, 'expires_at': token.expires_at}
+
+
 class CreateUserView(generics.CreateAPIView):
     ''' Cria um novo usuário no sistema '''
     serializer_class = UserSerializer
@@ -13,15 +24,42 @@ class CreateUserView(generics.CreateAPIView):
 class CreateTokenView(ObtainAuthToken):
     ''' Cria um novo token de autenticação para um usuário '''
     serializer_class = AuthTokenSerializer
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = 'login'
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+
+    def post(self, request, *args, **kwargs):
+        ''' Emite um novo token com validade de TOKEN_TTL segundos '''
+        serializer = self.serializer_class(
+            data=request.data,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        token = AuthToken.objects.issue(serializer.validated_data['user'])
+
+        return Response(token_response_data(token))
+
+
+class RotateTokenView(APIView):
+    ''' Troca o token autenticado por um novo, revogando o atual '''
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        token = AuthToken.objects.issue(request.user)
+        AuthToken.objects.filter(key=request.auth.key).delete()
+
+        return Response(token_response_data(token))
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     ''' Manager de usuário autenticado '''
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
-        ''' Busca e retorna o usuário autenticado '''
-        return self.request.user
+        ''' Busca e retorna o usuário autenticado, lido do BD para que a
+        atualização não parta de dados em cache '''
+        return get_user_model().objects.get(pk=self.request.user.pk)